@@ -0,0 +1,80 @@
+import os
+import hashlib
+import threading
+from app.cache import LRUCache, SQLiteCache, normalize_query
+from app.settings import CACHE_DIR
+
+ANSWER_TTL = int(os.getenv("DOCBOT_ANSWER_TTL", 24 * 3600))
+
+# Set DOCBOT_ANSWER_CACHE to an empty string to keep the cache per process
+SHARED_CACHE_PATH = os.getenv("DOCBOT_ANSWER_CACHE", os.path.join(CACHE_DIR, "docbot_answers.sqlite3"))
+
+
+def chunk_id(document):
+    metadata = document.metadata
+    return f"{metadata.get('source')}:{metadata.get('page')}:{metadata.get('chunk_index')}"
+
+
+class AnswerCache:
+    """Generated DocBot answers keyed by document set, model, normalized question and retrieved chunks.
+
+    Keying on the retrieved chunk ids as well as the question means an answer is
+    only reused when the model would have seen exactly the same context. Entries
+    live in an in-memory LRU and, optionally, a SQLite file shared by all workers.
+    """
+
+    def __init__(self, memory_size=1024, shared_path=SHARED_CACHE_PATH, ttl=ANSWER_TTL):
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=memory_size, ttl=ttl)
+        self.shared = SQLiteCache(shared_path, table="answers") if shared_path else None
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def key(self, docset, backend, question, documents):
+        raw = "\x1f".join([docset or "", backend, normalize_query(question)] + [chunk_id(d) for d in documents])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        answer = self.memory.get(key)
+        if answer is None and self.shared is not None:
+            answer = self.shared.get(key)
+            if answer is not None:
+                self.memory.set(key, answer)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def set(self, key, answer):
+        self.memory.set(key, answer)
+        if self.shared is not None:
+            self.shared.set(key, answer, ttl=self.ttl)
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.shared.purge_expired()
+
+    def stats(self):
+        total = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory": self.memory.stats(),
+        }
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+        return _cache
@@ -0,0 +1,66 @@
+import os
+import re
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("DOCBOT_CHUNK_SIZE", "1000"))
+DEFAULT_CHUNK_OVERLAP = int(os.getenv("DOCBOT_CHUNK_OVERLAP", "150"))
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def split_sentences(text, max_length):
+    """Split text into sentences, hard-wrapping any sentence longer than ``max_length``."""
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > max_length:
+            cut = sentence.rfind(" ", 0, max_length)
+            cut = cut if cut > 0 else max_length
+            yield sentence[:cut]
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            yield sentence
+
+
+def chunk_pages(pages, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """Lazily turn page records into overlapping chunks.
+
+    ``pages`` is an iterable of {"text", "source", "page"} records. Chunks hold whole
+    sentences up to ``chunk_size`` characters, never span two pages, and start with
+    the trailing sentences (up to ``chunk_overlap`` characters) of the previous chunk
+    from the same page. Each chunk is {"chunk", "source", "page", "chunk_index"}.
+    """
+    index = 0
+    for record in pages:
+        window = []
+        window_length = 0
+        for sentence in split_sentences(record["text"], chunk_size):
+            if window and window_length + len(sentence) + 1 > chunk_size:
+                yield {"chunk": " ".join(window), "source": record["source"], "page": record["page"], "chunk_index": index}
+                index += 1
+                # Carry the tail of this chunk over as overlap for the next one
+                overlap = []
+                overlap_length = 0
+                for previous in reversed(window):
+                    if overlap_length + len(previous) + 1 > chunk_overlap:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_length += len(previous) + 1
+                if overlap_length + len(sentence) + 1 > chunk_size:
+                    overlap, overlap_length = [], 0
+                window, window_length = overlap, overlap_length
+            window.append(sentence)
+            window_length += len(sentence) + 1
+        if window:
+            yield {"chunk": " ".join(window), "source": record["source"], "page": record["page"], "chunk_index": index}
+            index += 1
+
+
+def batched(items, batch_size):
+    """Yield lists of up to ``batch_size`` items from any iterable."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,65 @@
+from app.DocBot.answer_cache import get_answer_cache
+from app.metrics import span, count_answer
+
+CONDENSE_TEMPLATE = """Given the conversation below and a follow-up question, rephrase the follow-up question to be a standalone question.
+
+Chat history:
+{chat_history}
+
+Follow-up question: {question}
+Standalone question:"""
+
+
+def format_chat_history(chat_history):
+    return "\n".join(f"Human: {question}\nAssistant: {answer}" for question, answer in chat_history)
+
+
+class RetrievalConversation:
+    """Conversational question answering over one document set.
+
+    Same steps as LangChain's ConversationalRetrievalChain (condense the follow-up
+    question, retrieve, answer from the retrieved context), with the answer cache
+    between retrieval and generation: a question already answered from the same
+    chunks by the same model is returned without calling the model. Holds no
+    history; callers pass ``chat_history`` as (question, answer) pairs.
+    """
+
+    def __init__(self, docset, llm, retriever, prompt, backend, answer_cache=None):
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import PromptTemplate
+
+        self.docset = docset
+        self.retriever = retriever
+        self.backend = backend
+        self.answer_cache = answer_cache or get_answer_cache()
+        self.condense_chain = PromptTemplate.from_template(CONDENSE_TEMPLATE) | llm | StrOutputParser()
+        self.answer_chain = prompt | llm | StrOutputParser()
+
+    def invoke(self, inputs, config=None):
+        question = inputs["question"]
+        chat_history = inputs.get("chat_history") or []
+
+        if chat_history:
+            with span("docbot", "condense"):
+                condensed = self.condense_chain.invoke(
+                    {"chat_history": format_chat_history(chat_history), "question": question}, config=config
+                )
+            question = condensed.strip() or question
+
+        with span("docbot", "retrieve"):
+            documents = self.retriever.invoke(question, config=config)
+
+        key = self.answer_cache.key(self.docset, self.backend, question, documents)
+        answer = self.answer_cache.get(key)
+        if answer is not None:
+            count_answer("docbot", "cache")
+            return {"answer": answer, "source_documents": documents, "cached": True}
+
+        with span("docbot", "generate"):
+            answer = self.answer_chain.invoke(
+                {"context": "\n\n".join(document.page_content for document in documents), "question": question},
+                config=config,
+            )
+        count_answer("docbot", "llm")
+        self.answer_cache.set(key, answer)
+        return {"answer": answer, "source_documents": documents, "cached": False}
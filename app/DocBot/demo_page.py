@@ -1,83 +1,101 @@
 import os
+import json
+import queue
 import logging
+import threading
 from dotenv import load_dotenv
-from flask import Flask
-from PyPDF2 import PdfReader
-from docx import Document
-from langchain_community.vectorstores import FAISS
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationalRetrievalChain
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-logging.getLogger("urllib3").setLevel(logging.WARNING)
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-
-app = Flask(__name__)
-CORS(app)  # Allow all origins
-
-
-from langchain_huggingface import HuggingFaceEmbeddings  # ✅ Correct module
-  # ✅ Use correct module
+from flask import jsonify
+from app.DocBot.chunking import chunk_pages, batched, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+from app.DocBot.embedding_cache import CachedEmbeddings
+from app.DocBot.conversation import RetrievalConversation
+from app.DocBot.extractors import extract_records
+from app.DocBot.index_store import load_bm25
+from app.DocBot.llm import get_llm, backend_id
+from app.DocBot.retrieval import hybrid_retriever, build_bm25
+from app.DocBot.sessions import get_session_manager
+from app.embedding_service import get_embedding_service
 
 # ✅ Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Chunks embedded per forward pass when building a vectorstore
+EMBEDDING_BATCH_SIZE = int(os.getenv("DOCBOT_EMBEDDING_BATCH_SIZE", "64"))
+
+
+def warmup():
+    """Import the document and LLM libraries ahead of time (they are otherwise imported on first use)."""
+    import PyPDF2, docx  # noqa: F401,E401
+    import langchain.prompts, langchain_core.callbacks, langchain_core.output_parsers  # noqa: F401,E401
+    import langchain_core.retrievers  # noqa: F401
+    import langchain_community.vectorstores  # noqa: F401
+
+
+def get_documents_text(spooled):
+    """Lazily yield the text of spooled uploads, one record per page."""
+    return extract_records(spooled)
 
-def get_documents_text(files):
-    """Extract text from uploaded documents."""
-    text_data = []
-    for file in files:
-        try:
-            if file.filename.endswith('.pdf'):
-                pdf_reader = PdfReader(file)
-                text = "".join(page.extract_text() for page in pdf_reader.pages if page.extract_text())
-            elif file.filename.endswith('.docx'):
-                docx_reader = Document(file)
-                text = "\n".join(paragraph.text for paragraph in docx_reader.paragraphs)
-            else:
-                logger.warning(f"⚠ Unsupported file type: {file.filename}")
-                continue
-            text_data.append({"text": text, "source": file.filename})
-        except Exception as e:
-            logger.error(f"❌ Error processing file {file.filename}: {e}")
-    return text_data
 
+def get_text_chunks(page_records, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """Split extracted pages into overlapping, sentence-aligned chunks (lazily)."""
+    return chunk_pages(page_records, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
-def get_text_chunks(text_data):
-    """Split extracted text into smaller chunks for processing."""
-    chunks = []
-    for item in text_data:
-        chunks.append({"chunk": item["text"], "source": item["source"]})
-    return chunks
 
+def get_vectorstore(text_chunks, batch_size=EMBEDDING_BATCH_SIZE, progress=None):
+    """Create FAISS vectorstore with embeddings, embedding chunks in batches.
+
+    ``progress``, if given, is called with the number of chunks embedded so far after each batch.
+    Returns None when there are no chunks; embedding errors are logged and re-raised.
+    """
+    from langchain_community.vectorstores import FAISS
 
-def get_vectorstore(text_chunks):
-    """Create FAISS vectorstore with embeddings."""
     try:
-        texts = [item["chunk"] for item in text_chunks]
+        # Shared process-wide model instead of a new HuggingFaceEmbeddings per upload;
+        # chunks embedded by any earlier upload are read back from the on-disk cache
+        embedding_model = CachedEmbeddings(get_embedding_service())
+        hits_before, misses_before = embedding_model.cache.hits, embedding_model.cache.misses
+
+        vectorstore = None
+        total = 0
+        for batch in batched(text_chunks, batch_size):
+            texts = [item["chunk"] for item in batch]
+            metadatas = [{"source": item["source"], "page": item["page"], "chunk_index": item["chunk_index"]}
+                         for item in batch]
+            embeddings = embedding_model.embed_documents(texts)  # ✅ Use correct method
+            if vectorstore is None:
+                vectorstore = FAISS.from_embeddings(list(zip(texts, embeddings)), embedding_model.embed_query,
+                                                    metadatas=metadatas)
+            else:
+                vectorstore.add_embeddings(list(zip(texts, embeddings)), metadatas=metadatas)
+            total += len(texts)
+            if progress is not None:
+                progress(total)
 
-        if not texts:
+        if vectorstore is None:
             logger.error("❌ No text chunks available for vectorstore creation!")
             return None
 
-        embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        embeddings = embedding_model.embed_documents(texts)  # ✅ Use correct method
-
-        vectorstore = FAISS.from_embeddings(list(zip(texts, embeddings)), embedding_model.embed_query)
-
-        logger.info(f"✅ Successfully created FAISS vectorstore with {len(texts)} documents")
+        reused = embedding_model.cache.hits - hits_before
+        embedded = embedding_model.cache.misses - misses_before
+        logger.info("✅ Successfully created FAISS vectorstore with %s chunks "
+                    "(%s reused from the embedding cache, %s embedded)", total, reused, embedded)
         return vectorstore
     except Exception as e:
-        logger.error(f"❌ Error creating vectorstore: {e}", exc_info=True)
-        return None
+        logger.error("❌ Error creating vectorstore: %s", e, exc_info=True)
+        raise
 
 
 
-def get_conversation_chain(vectorstore):
-    """Initialize the conversation chain."""
+def get_conversation_chain(vectorstore, docset=None):
+    """Initialize the conversation chain.
+
+    The chain keeps no memory of its own: each session passes its windowed history in
+    as ``chat_history``, so one chain can serve every session over the same documents.
+    The model comes from the configured LLM backend (DOCBOT_LLM_BACKEND).
+    """
+    from langchain.prompts import PromptTemplate
+
     try:
         prompt_template = PromptTemplate(
             input_variables=["context", "question"],
@@ -92,45 +110,93 @@ def get_conversation_chain(vectorstore):
             """
         )
 
-        groq_api_key = os.getenv('GROQ_API_KEY')
-        if not groq_api_key:
-            raise ValueError("GROQ_API_KEY environment variable not set")
-
-        llm = ChatGroq(api_key=groq_api_key, temperature=0.5, max_tokens=500)
-
-        memory = ConversationBufferMemory(
-            memory_key="chat_history", return_messages=True, output_key="answer"
-        )
-
-        retriever = vectorstore.as_retriever()
+        llm = get_llm()
+        # BM25 catches exact course codes, USNs and section numbers that dense search misses
+        bm25 = load_bm25(docset, vectorstore) if docset else build_bm25(vectorstore)
+        retriever = hybrid_retriever(vectorstore, bm25)
 
-        conversation_chain = ConversationalRetrievalChain.from_llm(
-            llm=llm,
-            retriever=retriever,
-            memory=memory,
-            combine_docs_chain_kwargs={"prompt": prompt_template},
-            return_source_documents=True,
-            output_key="answer",  # ✅ Explicitly define output_key
-            verbose=True
-        )
+        conversation_chain = RetrievalConversation(docset, llm, retriever, prompt_template, backend_id(llm))
 
         logger.info("✅ Successfully created conversation chain")
         return conversation_chain
     except Exception as e:
-        logger.error(f"❌ Error creating conversation chain: {e}")
+        logger.error("❌ Error creating conversation chain: %s", e)
         return None
 
-def handle_userinput(user_question, session_id, conversation_chain):
+def handle_userinput(user_question, session, conversation_chain):
     """Process user input and return a response."""
     try:
-        if not user_question or not session_id:
+        if not user_question or session is None:
             return jsonify({"error": "Missing question or session_id"}), 400
 
-        response = conversation_chain.invoke({'question': user_question})
+        response = conversation_chain.invoke({'question': user_question, 'chat_history': session.chat_history()})
 
         answer = response.get("answer", "No response generated.")
+        get_session_manager().record_turn(session, user_question, answer)
         return jsonify({"answer": answer})
 
     except Exception as e:
-        logger.error(f"❌ Error processing user question: {e}")
+        logger.error("❌ Error processing user question: %s", e)
         return jsonify({"error": str(e)}), 500
+
+
+def source_metadata(documents):
+    """Source file, page and chunk of each retrieved document, for display next to an answer."""
+    return [dict(document.metadata) for document in documents]
+
+
+def _stream_handler(events):
+    """Callback handler that forwards retrieved sources and answer tokens to ``events``."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class StreamHandler(BaseCallbackHandler):
+        retrieved = False
+
+        def on_retriever_end(self, documents, **kwargs):
+            self.retrieved = True
+            events.put(("sources", source_metadata(documents)))
+
+        def on_llm_new_token(self, token, **kwargs):
+            # Tokens before retrieval belong to the question-condensing step, not the answer
+            if self.retrieved and token:
+                events.put(("token", token))
+
+    return StreamHandler()
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_userinput(user_question, session, conversation_chain):
+    """Answer a question as Server-Sent Events: ``sources`` first, then ``token``s, then ``done``.
+
+    The chain runs in a background thread; its callbacks push events onto a queue
+    that this generator drains, so the first token reaches the client as soon as
+    the model produces it.
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            response = conversation_chain.invoke(
+                {'question': user_question, 'chat_history': session.chat_history()},
+                config={"callbacks": [_stream_handler(events)]},
+            )
+            events.put(("done", response.get("answer", "No response generated.")))
+        except Exception as e:
+            logger.error("❌ Error processing user question: %s", e)
+            events.put(("error", str(e)))
+
+    threading.Thread(target=run, name="docbot-stream", daemon=True).start()
+
+    while True:
+        event, data = events.get()
+        if event == "done":
+            get_session_manager().record_turn(session, user_question, data)
+            yield sse_event("done", {"answer": data})
+            return
+        if event == "error":
+            yield sse_event("error", {"error": data})
+            return
+        yield sse_event(event, data)
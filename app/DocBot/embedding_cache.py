@@ -0,0 +1,153 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from app.embedding_service import get_embedding_service
+from app.settings import CACHE_DIR, EMBEDDING_MODEL_NAME
+
+EMBEDDING_CACHE_DIR = os.getenv("DOCBOT_EMBEDDING_CACHE_DIR", os.path.join(CACHE_DIR, "chunk_embeddings"))
+
+
+class EmbeddingCache:
+    """On-disk chunk embeddings keyed by sha256(model name, chunk text).
+
+    Vectors are appended to one flat float32 file and read back through a memory
+    map; a SQLite table maps each key to its row. Appends take SQLite's write lock
+    (BEGIN IMMEDIATE), so several worker processes can share one cache directory.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME, directory=EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.directory = os.path.join(directory, re.sub(r"[^\w.-]+", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.db_path = os.path.join(self.directory, "index.sqlite3")
+        self.hits = 0
+        self.misses = 0
+        self.embed_seconds = 0.0
+        self._local = threading.local()
+        self._map = None
+        self._map_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS rows (key BLOB PRIMARY KEY, row INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\x1f{text}".encode("utf-8")).digest()
+
+    def _dim(self):
+        row = self._connection().execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        return row[0] if row else None
+
+    def _vectors(self, needed_rows, dim):
+        """Memory map covering at least ``needed_rows`` rows, remapped when the file has grown."""
+        with self._map_lock:
+            if self._map is None or self._map.shape[0] < needed_rows:
+                rows = os.path.getsize(self.vectors_path) // (dim * 4)
+                self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            return self._map
+
+    def get_many(self, texts):
+        """Return a list with the cached vector for each text, or None where missing."""
+        keys = [self.key(text) for text in texts]
+        dim = self._dim()
+        found = {}
+        if dim is not None:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(conn.execute(f"SELECT key, row FROM rows WHERE key IN ({placeholders})", batch).fetchall())
+        if not found:
+            return [None] * len(texts)
+        vectors = self._vectors(max(found.values()) + 1, dim)
+        return [np.array(vectors[found[key]]) if key in found else None for key in keys]
+
+    def put_many(self, texts, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(texts):
+            return
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            dim = self._dim()
+            if dim is None:
+                dim = vectors.shape[1]
+                conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (dim,))
+            next_row = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+            with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "w+b") as f:
+                f.seek(next_row * dim * 4)
+                f.truncate()
+                f.write(vectors.tobytes())
+            conn.executemany(
+                "INSERT OR IGNORE INTO rows (key, row) VALUES (?, ?)",
+                [(self.key(text), next_row + offset) for offset, text in enumerate(texts)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        total = self.hits + self.misses
+        seconds_per_chunk = self.embed_seconds / self.misses if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "estimated_seconds_saved": round(self.hits * seconds_per_chunk, 3),
+        }
+
+
+class CachedEmbeddings:
+    """Embeddings wrapper that only sends chunks missing from the cache to the model."""
+
+    def __init__(self, embeddings=None, cache=None):
+        self.embeddings = embeddings or get_embedding_service()
+        self.cache = cache or get_embedding_cache()
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.cache.hits += len(texts) - len(missing)
+        self.cache.misses += len(missing)
+
+        if missing:
+            # Identical chunks within one upload are embedded once
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            start = time.perf_counter()
+            fresh = np.asarray(self.embeddings.embed_documents(unique), dtype=np.float32)
+            self.cache.embed_seconds += time.perf_counter() - start
+            self.cache.put_many(unique, fresh)
+            by_text = dict(zip(unique, fresh))
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
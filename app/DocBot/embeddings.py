@@ -1,14 +1,16 @@
 # embeddings.py
-from sentence_transformers import SentenceTransformer
+from app.embedding_service import EmbeddingService, get_embedding_service
+from app.settings import EMBEDDING_MODEL_NAME
 
 class TransformerEmbeddings:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME):
+        # Reuse the shared service for the app's model instead of loading another copy
+        self.model = get_embedding_service() if model_name == EMBEDDING_MODEL_NAME else EmbeddingService(model_name)
 
     def embed_documents(self, texts):
         """Generate embeddings for a list of texts."""
-        return self.model.encode(texts, convert_to_tensor=True)
+        return self.model.encode(texts)
 
     def embed_query(self, query):
         """Generate embedding for a single query."""
-        return self.model.encode(query, convert_to_tensor=True)
+        return self.model.encode(query)
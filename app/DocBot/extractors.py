@@ -0,0 +1,182 @@
+import os
+import uuid
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used for text extraction; 0 extracts inline in the ingestion thread
+EXTRACT_WORKERS = int(os.getenv("DOCBOT_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# PDF pages handed to one worker task
+PAGES_PER_TASK = int(os.getenv("DOCBOT_PAGES_PER_TASK", "50"))
+
+# Extraction workers are started by a clean server process rather than forked from
+# this multithreaded one, whose locks (logging queue, SQLite, the embedding batcher)
+# another thread may hold at the moment of the fork
+EXTRACT_START_METHOD = os.getenv("DOCBOT_EXTRACT_START_METHOD",
+                                 "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+# File extension -> extractor(path, source, start, stop) yielding {"text", "source", "page"}
+EXTRACTORS = {}
+
+# File extension -> function(path) returning the number of pages, for formats split across tasks
+PAGE_COUNTERS = {}
+
+
+def register_extractor(*extensions, page_counter=None):
+    """Register a text extractor for one or more file extensions."""
+    def decorator(func):
+        for extension in extensions:
+            EXTRACTORS[extension] = func
+            if page_counter is not None:
+                PAGE_COUNTERS[extension] = page_counter
+        return func
+    return decorator
+
+
+def _pdf_page_count(path):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(path).pages)
+
+
+@register_extractor(".pdf", page_counter=_pdf_page_count)
+def extract_pdf(path, source, start=0, stop=None):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for index in range(start, stop):
+        text = reader.pages[index].extract_text()
+        if text:
+            yield {"text": text, "source": source, "page": index + 1}
+
+
+@register_extractor(".docx")
+def extract_docx(path, source, start=0, stop=None):
+    from docx import Document
+    text = "\n".join(paragraph.text for paragraph in Document(path).paragraphs)
+    if text.strip():
+        yield {"text": text, "source": source, "page": 1}
+
+
+@register_extractor(".txt", ".md")
+def extract_text_file(path, source, start=0, stop=None):
+    # Form feeds mark page breaks in plain-text exports
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for number, page in enumerate(f.read().split("\f"), start=1):
+            if page.strip():
+                yield {"text": page, "source": source, "page": number}
+
+
+@register_extractor(".html", ".htm")
+def extract_html(path, source, start=0, stop=None):
+    from app.fetch import make_soup
+    with open(path, "rb") as f:
+        soup = make_soup(f.read())
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+    if text.strip():
+        yield {"text": text, "source": source, "page": 1}
+
+
+def extension(filename):
+    return os.path.splitext(filename)[1].lower()
+
+
+def spool_uploads(files, directory):
+    """Save uploaded files to ``directory`` (streamed, not read into memory).
+
+    Returns [(path, original filename)] for supported file types.
+    """
+    spooled = []
+    for file in files:
+        if extension(file.filename) not in EXTRACTORS:
+            logger.warning("⚠ Unsupported file type: %s", file.filename)
+            continue
+        path = os.path.join(directory, f"{uuid.uuid4().hex}{extension(file.filename)}")
+        file.save(path)
+        spooled.append((path, file.filename))
+    return spooled
+
+
+def _run_task(path, source, start, stop):
+    """Worker entry point: extract one file or page range into (records, error or None).
+
+    Failures are returned rather than logged, since worker processes have no logging
+    setup of their own; ``_task_records`` logs them in the calling process.
+    """
+    try:
+        return list(EXTRACTORS[extension(path)](path, source, start, stop)), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def _task_records(task, result):
+    records, error = result
+    if error:
+        path, source, start, stop = task
+        pages = f" (pages {start + 1}-{stop})" if stop is not None else ""
+        logger.error("❌ Error processing file %s%s: %s", source, pages, error)
+    return records
+
+
+def _tasks(spooled, pages_per_task):
+    for path, source in spooled:
+        counter = PAGE_COUNTERS.get(extension(path))
+        pages = None
+        if counter is not None:
+            try:
+                pages = counter(path)
+            except Exception as e:
+                logger.error("❌ Error processing file %s: %s", source, e)
+                continue
+        if pages is None:
+            yield path, source, 0, None
+        else:
+            for start in range(0, pages, pages_per_task):
+                yield path, source, start, start + pages_per_task
+
+
+# Worker count -> process pool, so callers asking for a different pool size get one
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers=EXTRACT_WORKERS):
+    with _executor_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(EXTRACT_START_METHOD))
+        return executor
+
+
+def extract_records(spooled, workers=EXTRACT_WORKERS, pages_per_task=PAGES_PER_TASK):
+    """Yield page records for spooled files in file and page order.
+
+    Files and PDF page ranges are extracted in a process pool; records are yielded
+    as soon as the task covering them finishes, so callers can start chunking and
+    embedding before the last page is read. At most ``2 * workers`` tasks are in
+    flight, so extracted text never gets far ahead of a slower consumer.
+    """
+    tasks = list(_tasks(spooled, pages_per_task))
+    if workers <= 0 or len(tasks) <= 1:
+        for task in tasks:
+            yield from _task_records(task, _run_task(*task))
+        return
+
+    executor = _get_executor(workers)
+    max_in_flight = workers * 2
+    pending = deque()
+    for task in tasks:
+        if len(pending) >= max_in_flight:
+            done_task, future = pending.popleft()
+            yield from _task_records(done_task, future.result())
+        pending.append((task, executor.submit(_run_task, *task)))
+    while pending:
+        done_task, future = pending.popleft()
+        yield from _task_records(done_task, future.result())
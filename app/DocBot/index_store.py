@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import numpy as np
+from app.bm25 import BM25Index
+from app.cache import LRUCache
+from app.DocBot.chunking import DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+from app.embedding_service import get_embedding_service
+from app.metrics import registry
+from app.settings import CACHE_DIR, EMBEDDING_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.getenv("DOCBOT_INDEX_DIR", os.path.join(CACHE_DIR, "faiss"))
+
+# Bumped when the on-disk layout changes; older indexes are simply rebuilt
+INDEX_FORMAT = "v2"
+
+# Document-set indexes kept open per process; others are re-mapped from disk on demand
+RESIDENT_INDEXES = int(os.getenv("DOCBOT_RESIDENT_INDEXES", "16"))
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def docset_id(spooled, chunk_size=DEFAULT_CHUNK_SIZE, chunk_overlap=DEFAULT_CHUNK_OVERLAP):
+    """Identify a set of uploaded documents by content, independent of file names and order."""
+    digests = sorted(file_sha256(path) for path, _ in spooled)
+    raw = "\x1f".join([EMBEDDING_MODEL_NAME, str(chunk_size), str(chunk_overlap)] + digests)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def index_path(docset):
+    return os.path.join(INDEX_DIR, INDEX_FORMAT, docset)
+
+
+class MappedIndex:
+    """Exact L2 search over a read-only, memory-mapped float32 matrix.
+
+    Follows the ``search`` contract of faiss.IndexFlatL2, which is what LangChain
+    builds, but the vectors stay in the page cache shared by every worker instead of
+    being copied into each process. Only the row norms are held in memory.
+    """
+
+    def __init__(self, vectors, norms):
+        self.vectors = vectors
+        self.norms = norms
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, queries, k):
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, self.ntotal)
+        distances = self.norms[None, :] - 2 * (queries @ self.vectors.T) + (queries * queries).sum(axis=1, keepdims=True)
+        rows = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(distances, rows, axis=1)
+        order = np.argsort(top, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+class MappedVectorStore:
+    """Read-only view of a saved document set with the attributes retrieval uses from a FAISS vectorstore."""
+
+    def __init__(self, index, docstore, index_to_docstore_id, embedding_function):
+        self.index = index
+        self.docstore = docstore
+        self.index_to_docstore_id = index_to_docstore_id
+        self.embedding_function = embedding_function
+
+
+_resident = LRUCache(maxsize=RESIDENT_INDEXES)
+_resident_bm25 = LRUCache(maxsize=RESIDENT_INDEXES)
+_load_lock = threading.Lock()
+
+
+def save_index(docset, vectorstore):
+    """Persist a FAISS vectorstore and its BM25 index for a document set (atomically).
+
+    Vectors go to ``vectors.npy`` (memory-mapped when loaded) and the chunks with their
+    metadata to ``docstore.json``; nothing in the directory is unpickled on load.
+    """
+    from app.DocBot.retrieval import build_bm25
+
+    final_dir = index_path(docset)
+    tmp_dir = f"{final_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    ids = list(vectorstore.index_to_docstore_id[row] for row in range(vectorstore.index.ntotal))
+    vectors = np.asarray(vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal), dtype=np.float32)
+    with open(os.path.join(tmp_dir, "vectors.npy"), "wb") as f:
+        np.save(f, vectors)
+    documents = [vectorstore.docstore.search(doc_id) for doc_id in ids]
+    with open(os.path.join(tmp_dir, "docstore.json"), "w", encoding="utf-8") as f:
+        json.dump({"ids": ids, "documents": [{"page_content": document.page_content, "metadata": document.metadata}
+                                             for document in documents]}, f)
+    bm25 = build_bm25(vectorstore)
+    with open(os.path.join(tmp_dir, "bm25.json"), "w", encoding="utf-8") as f:
+        json.dump(bm25.to_dict(), f)
+    try:
+        os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+        os.rename(tmp_dir, final_dir)
+    except OSError:
+        # Another worker saved the same document set first; theirs is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _resident_bm25.set(docset, bm25)
+    logger.info("💾 Saved index for document set %s", docset)
+
+
+def load_index(docset):
+    """Return the vectorstore for a document set, memory-mapping its vectors from disk if needed."""
+    vectorstore = _resident.get(docset)
+    if vectorstore is not None:
+        return vectorstore
+
+    directory = index_path(docset)
+    if not os.path.exists(os.path.join(directory, "vectors.npy")):
+        return None
+
+    with _load_lock:
+        vectorstore = _resident.get(docset)
+        if vectorstore is not None:
+            return vectorstore
+
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_core.documents import Document
+
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        norms = np.einsum("ij,ij->i", vectors, vectors)
+        with open(os.path.join(directory, "docstore.json"), "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        docstore = InMemoryDocstore({doc_id: Document(**document) for doc_id, document in zip(saved["ids"], saved["documents"])})
+        vectorstore = MappedVectorStore(MappedIndex(vectors, norms), docstore, dict(enumerate(saved["ids"])),
+                                        get_embedding_service().embed_query)
+        _resident.set(docset, vectorstore)
+        logger.info("📂 Memory-mapped index for document set %s", docset)
+        return vectorstore
+
+
+def load_bm25(docset, vectorstore):
+    """Return the BM25 index for a document set, building it from ``vectorstore`` if it was never saved."""
+    bm25 = _resident_bm25.get(docset)
+    if bm25 is not None:
+        return bm25
+
+    path = os.path.join(index_path(docset), "bm25.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            bm25 = BM25Index.from_dict(json.load(f))
+    else:
+        from app.DocBot.retrieval import build_bm25
+        bm25 = build_bm25(vectorstore)
+    _resident_bm25.set(docset, bm25)
+    return bm25
+
+
+def _mapped_index_bytes():
+    return sum(vectorstore.index.vectors.nbytes for vectorstore in _resident.values())
+
+
+registry.gauge("docbot_resident_indexes", "Document-set indexes open in this process.", lambda: len(_resident))
+registry.gauge("docbot_mapped_index_bytes", "Memory-mapped vector bytes of open indexes (shared page cache, not heap).",
+               _mapped_index_bytes)
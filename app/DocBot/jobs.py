@@ -0,0 +1,312 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import logging
+import itertools
+import threading
+from app.metrics import span
+from app.settings import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("DOCBOT_JOB_DB", os.path.join(CACHE_DIR, "docbot_jobs.sqlite3"))
+
+# Uploads waiting for (or being) ingested; each job gets its own directory, removed when it ends
+UPLOAD_DIR = os.getenv("DOCBOT_UPLOAD_DIR", os.path.join(CACHE_DIR, "uploads"))
+
+# Ingestion threads per worker process, and jobs allowed to run at once across all workers.
+# Keeping both low leaves CPU and the embedding model free for query traffic.
+INGEST_THREADS = int(os.getenv("DOCBOT_INGEST_THREADS", "1"))
+MAX_RUNNING_JOBS = int(os.getenv("DOCBOT_MAX_RUNNING_JOBS", "2"))
+
+JOB_POLL_INTERVAL = float(os.getenv("DOCBOT_JOB_POLL_SECONDS", "1.0"))
+
+# A running job whose heartbeat has not been updated for this long is assumed lost
+# (its worker died) and is queued again; live workers beat every quarter of this
+JOB_STALE_SECONDS = float(os.getenv("DOCBOT_JOB_STALE_SECONDS", "600"))
+
+# Finished jobs are kept this long so clients can still read their result
+JOB_RETENTION_SECONDS = float(os.getenv("DOCBOT_JOB_RETENTION_SECONDS", 24 * 3600))
+
+_COLUMNS = ("job_id", "status", "files", "upload_dir", "pages", "chunks", "docset_id", "session_id",
+            "error", "created_at", "updated_at", "owner")
+
+
+class JobQueue:
+    """Ingestion jobs in SQLite (WAL): a broker-free queue shared by every worker process.
+
+    Jobs move queued -> running -> done | failed. ``claim`` takes the oldest queued
+    job under SQLite's write lock, and only while fewer than ``max_running`` jobs are
+    running anywhere. Each claim gets a fresh owner token; writes made with it only
+    apply while the job is still owned by that claim, so a worker whose job was
+    requeued as stale cannot finish, fail or clean up after the job's new owner.
+    """
+
+    def __init__(self, path=JOB_DB_PATH, max_running=MAX_RUNNING_JOBS, stale_after=JOB_STALE_SECONDS):
+        self.path = path
+        self.max_running = max_running
+        self.stale_after = stale_after
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, files TEXT NOT NULL, "
+            "upload_dir TEXT NOT NULL, pages INTEGER NOT NULL DEFAULT 0, chunks INTEGER NOT NULL DEFAULT 0, "
+            "docset_id TEXT, session_id TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "owner TEXT)"
+        )
+        if "owner" not in {column[1] for column in conn.execute("PRAGMA table_info(jobs)")}:
+            conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, upload_dir, spooled):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO jobs (job_id, status, files, upload_dir, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(spooled), upload_dir, now, now),
+        )
+        for row in conn.execute(
+            "SELECT upload_dir FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (now - JOB_RETENTION_SECONDS,),
+        ).fetchall():
+            shutil.rmtree(row[0], ignore_errors=True)
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (now - JOB_RETENTION_SECONDS,)
+        )
+        return job_id
+
+    def claim(self):
+        """Mark the oldest queued job running and return it, or None if there is none or the limit is reached."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL WHERE status = 'running' AND updated_at < ?",
+                (now - self.stale_after,),
+            )
+            running = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+            row = None
+            if running < self.max_running:
+                row = conn.execute(
+                    f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    owner = uuid.uuid4().hex
+                    conn.execute("UPDATE jobs SET status = 'running', owner = ?, updated_at = ? WHERE job_id = ?",
+                                 (owner, now, row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = self._job(row)
+        job.update(status="running", owner=owner)
+        return job
+
+    def update(self, job_id, owner=None, **fields):
+        """Set fields (and the heartbeat); with ``owner``, only if that claim still owns the job.
+
+        Returns whether the job was updated.
+        """
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        query = f"UPDATE jobs SET {assignments} WHERE job_id = ?"
+        params = [*fields.values(), job_id]
+        if owner is not None:
+            query += " AND owner = ? AND status = 'running'"
+            params.append(owner)
+        return self._connection().execute(query, params).rowcount == 1
+
+    def heartbeat(self, job_id, owner):
+        return self.update(job_id, owner=owner)
+
+    def get(self, job_id):
+        conn = self._connection()
+        row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = self._job(row)
+        if job["status"] == "queued":
+            job["queue_position"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job["created_at"],)
+            ).fetchone()[0]
+        return job
+
+    def stats(self):
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _job(row):
+        job = dict(zip(_COLUMNS, row))
+        job["files"] = [tuple(item) for item in json.loads(job["files"])]
+        return job
+
+
+class JobProgress:
+    """Counts pages and chunks for a job, writing them to the queue at most every ``interval`` seconds."""
+
+    def __init__(self, queue, job_id, owner=None, interval=0.5):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.interval = interval
+        self.pages = 0
+        self.chunks = 0
+        self._written_at = 0.0
+
+    def count_pages(self, page_records):
+        for record in page_records:
+            self.pages += 1
+            self.flush()
+            yield record
+
+    def set_chunks(self, chunks):
+        self.chunks = chunks
+        self.flush()
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if force or now - self._written_at >= self.interval:
+            self._written_at = now
+            self.queue.update(self.job_id, owner=self.owner, pages=self.pages, chunks=self.chunks)
+
+
+def ingest(job, queue):
+    """Extract, chunk, embed and index a job's files, then open a session over them."""
+    from app.DocBot.demo_page import get_documents_text, get_text_chunks, get_vectorstore
+    from app.DocBot.index_store import docset_id, load_index, save_index
+    from app.DocBot.sessions import get_session_manager
+
+    progress = JobProgress(queue, job["job_id"], job.get("owner"))
+    spooled = job["files"]
+    with span("docbot_ingest", "hash"):
+        docset = docset_id(spooled)
+    vectorstore = load_index(docset)
+    if vectorstore is None:
+        page_records = progress.count_pages(get_documents_text(spooled))
+        first_page = next(page_records, None)
+        if first_page is None:
+            raise ValueError("No valid text extracted")
+
+        # Extraction, chunking and embedding are interleaved, so they are timed as one stage
+        text_chunks = get_text_chunks(itertools.chain([first_page], page_records))
+        with span("docbot_ingest", "embed"):
+            vectorstore = get_vectorstore(text_chunks, progress=progress.set_chunks)
+        if not vectorstore:
+            raise ValueError("No text chunks to index")
+        with span("docbot_ingest", "save"):
+            save_index(docset, vectorstore)
+    else:
+        logger.info("Reusing index for document set %s", docset)
+
+    progress.flush(force=True)
+    return docset, get_session_manager().create(docset).session_id
+
+
+class IngestionWorker:
+    """Background threads in this process that run queued ingestion jobs.
+
+    Threads are started on first use (and again after a fork); ``notify`` wakes them
+    as soon as this process enqueues a job, otherwise they poll the shared queue.
+    """
+
+    def __init__(self, queue, threads=INGEST_THREADS, poll_interval=JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._pid == os.getpid():
+            return self
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                for number in range(self.threads):
+                    threading.Thread(target=self._loop, name=f"docbot-ingest-{number}", daemon=True).start()
+        return self
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        while True:
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                logger.error("❌ Could not claim ingestion job: %s", e)
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run(job)
+
+    def _heartbeat(self, job, stopped):
+        while not stopped.wait(self.queue.stale_after / 4):
+            if not self.queue.heartbeat(job["job_id"], job["owner"]):
+                return  # requeued or finished elsewhere
+
+    def run(self, job):
+        job_id, owner = job["job_id"], job["owner"]
+        start = time.perf_counter()
+        logger.info("Ingestion job %s started (%s files)", job_id, len(job['files']))
+        stopped = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job, stopped), name=f"docbot-heartbeat-{job_id[:8]}",
+                         daemon=True).start()
+        try:
+            docset, session_id = ingest(job, self.queue)
+            finished = self.queue.update(job_id, owner=owner, status="done", docset_id=docset, session_id=session_id)
+            logger.info("Ingestion job %s finished in %.1fs, session %s", job_id, time.perf_counter() - start, session_id)
+        except Exception as e:
+            logger.error("❌ Ingestion job %s failed: %s", job_id, e, exc_info=True)
+            finished = self.queue.update(job_id, owner=owner, status="failed", error=str(e) or type(e).__name__)
+        finally:
+            stopped.set()
+        # A job requeued while this run was still going belongs to another worker now,
+        # and so do its uploaded files
+        if finished:
+            shutil.rmtree(job["upload_dir"], ignore_errors=True)
+        else:
+            logger.warning("⚠️ Ingestion job %s was taken over by another worker; leaving its files", job_id)
+
+
+_queue = None
+_worker = None
+_jobs_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    with _jobs_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def get_ingestion_worker():
+    """The process-wide ingestion worker, started."""
+    global _worker
+    queue = get_job_queue()
+    with _jobs_lock:
+        if _worker is None:
+            _worker = IngestionWorker(queue)
+    return _worker.start()
@@ -0,0 +1,126 @@
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Which registered backend answers DocBot questions: groq, llamacpp or fake
+LLM_BACKEND = os.getenv("DOCBOT_LLM_BACKEND", "groq")
+
+LLM_TEMPERATURE = float(os.getenv("DOCBOT_LLM_TEMPERATURE", "0.5"))
+LLM_MAX_TOKENS = int(os.getenv("DOCBOT_LLM_MAX_TOKENS", "500"))
+
+# Backend name -> factory returning a LangChain chat model or LLM
+LLM_BACKENDS = {}
+
+
+def register_backend(name):
+    """Register a factory for an LLM backend selectable with DOCBOT_LLM_BACKEND."""
+    def decorator(factory):
+        LLM_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+@register_backend("groq")
+def groq_llm():
+    from langchain_groq import ChatGroq
+
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if not groq_api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set")
+    kwargs = {"model_name": os.getenv("DOCBOT_GROQ_MODEL")} if os.getenv("DOCBOT_GROQ_MODEL") else {}
+    # streaming=True makes the model report tokens to callbacks as they arrive
+    return ChatGroq(api_key=groq_api_key, temperature=LLM_TEMPERATURE, max_tokens=LLM_MAX_TOKENS,
+                    streaming=True, **kwargs)
+
+
+@register_backend("llamacpp")
+def llamacpp_llm():
+    """A local GGUF model through llama.cpp: no network round-trip and no API rate limit."""
+    from langchain_community.llms import LlamaCpp
+
+    model_path = os.getenv("DOCBOT_LLAMA_MODEL_PATH")
+    if not model_path:
+        raise ValueError("DOCBOT_LLAMA_MODEL_PATH environment variable not set")
+    return LlamaCpp(
+        model_path=model_path,
+        n_ctx=int(os.getenv("DOCBOT_LLAMA_CONTEXT", "4096")),
+        n_threads=int(os.getenv("DOCBOT_LLAMA_THREADS", str(os.cpu_count() or 1))),
+        temperature=LLM_TEMPERATURE,
+        max_tokens=LLM_MAX_TOKENS,
+        streaming=True,
+        verbose=False,
+    )
+
+
+@register_backend("fake")
+def fake_llm():
+    """Deterministic offline model for tests and benchmarks (see FakeChatModel)."""
+    return fake_chat_model_class()(token_delay=float(os.getenv("DOCBOT_FAKE_TOKEN_DELAY", "0.02")))
+
+
+def fake_chat_model_class():
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+        """Answers with the opening words of the prompt's context, one token every ``token_delay`` seconds.
+
+        Prompts without a context (question condensing) get the follow-up question back.
+        """
+
+        token_delay: float = 0.0
+        max_words: int = 60
+        streaming: bool = True
+
+        @property
+        def _llm_type(self):
+            return "docbot-fake"
+
+        def _reply(self, messages):
+            prompt = messages[-1].content
+            if "Follow-up question:" in prompt:
+                return prompt.split("Follow-up question:", 1)[1].split("\n", 1)[0].strip()
+            if "Context:" in prompt:
+                context = prompt.split("Context:", 1)[1].split("Question:", 1)[0]
+                return " ".join(context.split()[:self.max_words]) or "I don't know."
+            return "I don't know."
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            for index, word in enumerate(self._reply(messages).split(" ")):
+                if self.token_delay:
+                    time.sleep(self.token_delay)
+                token = word if index == 0 else " " + word
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+
+    return FakeChatModel
+
+
+def backend_id(llm, name=LLM_BACKEND):
+    """Backend and model, so answers cached for one model are never served for another."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model_path", None) or ""
+    return f"{name}:{model}"
+
+
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def get_llm(name=LLM_BACKEND):
+    """The process-wide model client for a backend, created on first use."""
+    with _llms_lock:
+        if name not in _llms:
+            if name not in LLM_BACKENDS:
+                raise ValueError(f"Unknown DOCBOT_LLM_BACKEND '{name}' (choose from {', '.join(LLM_BACKENDS)})")
+            _llms[name] = LLM_BACKENDS[name]()
+            logger.info("✅ Using '%s' LLM backend for DocBot", name)
+        return _llms[name]
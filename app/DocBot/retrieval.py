@@ -0,0 +1,139 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from app.bm25 import BM25Index, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Chunks returned per question, and candidates taken from each of BM25 and FAISS before fusion
+RETRIEVAL_K = int(os.getenv("DOCBOT_RETRIEVAL_K", "4"))
+RETRIEVAL_CANDIDATES = int(os.getenv("DOCBOT_RETRIEVAL_CANDIDATES", "20"))
+
+# Relative weight of the BM25 ranking in reciprocal-rank fusion (dense ranking weighs 1.0),
+# multiplied for questions that quote a code (any token with a digit: CS501, a USN, 4.2)
+BM25_WEIGHT = float(os.getenv("DOCBOT_BM25_WEIGHT", "1.0"))
+CODE_QUERY_BOOST = float(os.getenv("DOCBOT_CODE_QUERY_BOOST", "2.0"))
+
+# Rank damping in fusion; lower values let each ranking's top hits count for more
+RRF_K = int(os.getenv("DOCBOT_RRF_K", "20"))
+
+# Optional cross-encoder reranking of the fused candidates; empty disables it
+RERANK_MODEL = os.getenv("DOCBOT_RERANK_MODEL", "")
+RERANK_CANDIDATES = int(os.getenv("DOCBOT_RERANK_CANDIDATES", "12"))
+
+# Retrieval time budget; reranking is trimmed (or skipped) to stay within it
+RETRIEVAL_BUDGET_MS = float(os.getenv("DOCBOT_RETRIEVAL_BUDGET_MS", "300"))
+
+
+def build_bm25(vectorstore):
+    """BM25 index over a FAISS vectorstore's chunks, with FAISS row numbers as document ids."""
+    docstore, ids = vectorstore.docstore, vectorstore.index_to_docstore_id
+    return BM25Index(tokenize(docstore.search(ids[row]).page_content, keep_codes=True) for row in range(len(ids)))
+
+
+def fuse(rankings, weights=None, k=RRF_K):
+    """Weighted reciprocal-rank fusion of several rankings (lists of ids, best first).
+
+    Returns [(id, score)] best first. Ranks are fused rather than raw scores, so BM25
+    scores and FAISS distances never need to be put on a common scale.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class Reranker:
+    """Lazily loaded sentence-transformers CrossEncoder that tracks its cost per candidate."""
+
+    def __init__(self, model_name=RERANK_MODEL):
+        self.model_name = model_name
+        self.seconds_per_candidate = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+                    logger.info("✅ Loaded rerank model '%s'", self.model_name)
+        return self._model
+
+    def affordable(self, budget_seconds, limit):
+        """How many candidates can be reranked within ``budget_seconds`` (all of ``limit`` until measured)."""
+        if self.seconds_per_candidate is None:
+            return limit
+        return max(0, min(limit, int(budget_seconds / self.seconds_per_candidate)))
+
+    def rerank(self, query, texts):
+        start = time.perf_counter()
+        scores = self.model.predict([(query, text) for text in texts])
+        per_candidate = (time.perf_counter() - start) / len(texts)
+        # Moving average, so one slow call does not disable reranking for good
+        self.seconds_per_candidate = per_candidate if self.seconds_per_candidate is None \
+            else 0.8 * self.seconds_per_candidate + 0.2 * per_candidate
+        return [float(score) for score in scores]
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker():
+    """The process-wide reranker, or None when DOCBOT_RERANK_MODEL is not set."""
+    global _reranker
+    if not RERANK_MODEL:
+        return None
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = Reranker()
+        return _reranker
+
+
+def hybrid_search(query, vectorstore, bm25, k=RETRIEVAL_K, candidates=RETRIEVAL_CANDIDATES,
+                  bm25_weight=BM25_WEIGHT, reranker=None, budget_ms=RETRIEVAL_BUDGET_MS):
+    """Top ``k`` documents for a query from BM25 and FAISS candidates, fused and optionally reranked."""
+    start = time.perf_counter()
+    ids, docstore = vectorstore.index_to_docstore_id, vectorstore.docstore
+
+    query_vector = np.asarray([vectorstore.embedding_function(query)], dtype=np.float32)
+    _, rows = vectorstore.index.search(query_vector, min(candidates, len(ids)))
+    dense = [int(row) for row in rows[0] if row >= 0]
+    query_tokens = tokenize(query, keep_codes=True)
+    sparse = [doc_id for doc_id, _ in bm25.search(query_tokens, k=candidates)]
+
+    if any(any(char.isdigit() for char in token) for token in query_tokens):
+        bm25_weight *= CODE_QUERY_BOOST
+    fused = [doc_id for doc_id, _ in fuse([dense, sparse], [1.0, bm25_weight])]
+    documents = [docstore.search(ids[row]) for row in fused[:max(k, RERANK_CANDIDATES if reranker else k)]]
+
+    if reranker is not None and len(documents) > 1:
+        remaining = budget_ms / 1000 - (time.perf_counter() - start)
+        count = reranker.affordable(remaining, len(documents))
+        if count > 1:
+            scores = reranker.rerank(query, [document.page_content for document in documents[:count]])
+            order = sorted(range(count), key=lambda i: scores[i], reverse=True)
+            documents = [documents[i] for i in order] + documents[count:]
+    return documents[:k]
+
+
+def hybrid_retriever(vectorstore, bm25, **kwargs):
+    """LangChain retriever around ``hybrid_search``, so callbacks still see retrieval start and end."""
+    from langchain_core.retrievers import BaseRetriever
+
+    class HybridRetriever(BaseRetriever):
+        vectorstore: object
+        bm25: object
+        options: dict = {}
+
+        def _get_relevant_documents(self, query, *, run_manager=None):
+            return hybrid_search(query, self.vectorstore, self.bm25, reranker=get_reranker(), **self.options)
+
+    return HybridRetriever(vectorstore=vectorstore, bm25=bm25, options=kwargs)
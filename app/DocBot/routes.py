@@ -1,94 +1,169 @@
 import os
 import logging
-import uuid
-from flask import request, jsonify
+import shutil
+import tempfile
+from flask import request, jsonify, Response, stream_with_context
 from dotenv import load_dotenv  # Import dotenv for loading .env variables
-from .demo_page import handle_userinput, get_documents_text, get_text_chunks, get_vectorstore, get_conversation_chain
+from .demo_page import handle_userinput, stream_userinput, get_conversation_chain
+from .answer_cache import get_answer_cache
+from .embedding_cache import get_embedding_cache
+from .extractors import spool_uploads
+from .llm import LLM_BACKEND
+from .index_store import docset_id, load_index, RESIDENT_INDEXES
+from .jobs import get_job_queue, get_ingestion_worker, UPLOAD_DIR
+from .sessions import get_session_manager
+from app.cache import LRUCache
+from app.metrics import latency
 from . import docbot_bp
 from flask import render_template
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 # Fetch Groq API key from .env file
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
+if LLM_BACKEND == "groq" and not GROQ_API_KEY:
     logger.error("GROQ_API_KEY is not set in the .env file")
 
-# Store conversation sessions
-conversation_store = {}
+# Conversation chains per document set; they hold no history, so sessions share them
+conversation_store = LRUCache(maxsize=RESIDENT_INDEXES)
+
+
+def conversation_for(docset):
+    """Return the conversation chain for a document set, loading its index if needed."""
+    conversation_chain = conversation_store.get(docset)
+    if conversation_chain is not None:
+        return conversation_chain
+
+    vectorstore = load_index(docset)
+    if vectorstore is None:
+        logger.error("Index for document set %s is missing", docset)
+        return None
+    conversation_chain = get_conversation_chain(vectorstore, docset)
+    if conversation_chain:
+        conversation_store.set(docset, conversation_chain)
+    return conversation_chain
 
 @docbot_bp.route('/upload', methods=['POST'])
 def upload_documents():
-    """Handle document uploads and create a conversation chain."""
+    """Queue uploaded documents for ingestion and return a job id.
+
+    Files are only spooled to disk here; extraction, embedding and indexing run in
+    a background job whose progress is at /docbot/jobs/<job_id>. A document set that
+    was indexed before (by any session) gets its session immediately.
+    """
     try:
         files = request.files.getlist("files")  # Ensure key matches frontend
         if not files:
             logger.error("No files uploaded")
             return jsonify({"error": "No files uploaded"}), 400
 
-        text_data = get_documents_text(files)
-        if not text_data:
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        upload_dir = tempfile.mkdtemp(prefix="docbot-upload-", dir=UPLOAD_DIR)
+        spooled = spool_uploads(files, upload_dir)
+        if not spooled:
+            shutil.rmtree(upload_dir, ignore_errors=True)
             logger.error("No valid text extracted")
             return jsonify({"error": "No valid text extracted"}), 400
 
-        text_chunks = get_text_chunks(text_data)
-        vectorstore = get_vectorstore(text_chunks)
-        if not vectorstore:
-            logger.error("Failed to create vectorstore")
-            return jsonify({"error": "Failed to create vectorstore"}), 500
-
-        conversation_chain = get_conversation_chain(vectorstore)
-        if not conversation_chain:
-            logger.error("Failed to initialize conversation chain")
-            return jsonify({"error": "Failed to initialize conversation chain"}), 500
-
-        session_id = str(uuid.uuid4())  # Unique session ID
-        conversation_store[session_id] = conversation_chain
-
-        logger.info(f"New session created: {session_id}")
-        return jsonify({"session_id": session_id}), 200
+        docset = docset_id(spooled)
+        if load_index(docset) is not None:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            session_id = get_session_manager().create(docset).session_id
+            logger.info("Reusing index for document set %s, new session created: %s", docset, session_id)
+            return jsonify({"status": "done", "session_id": session_id}), 200
+
+        job_id = get_job_queue().enqueue(upload_dir, spooled)
+        get_ingestion_worker().notify()
+        logger.info("Ingestion job queued: %s", job_id)
+        return jsonify({"status": "queued", "job_id": job_id}), 202
     except Exception as e:
-        logger.error(f"Error processing documents: {e}")
+        logger.error("Error processing documents: %s", e)
         return jsonify({"error": str(e)}), 500
 
-@docbot_bp.route('/query', methods=['POST'])
-def query_handler():
-    """Handle user queries and fetch relevant answers."""
-    try:
-        data = request.get_json()
+@docbot_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status and progress of an ingestion job; ``session_id`` is set once it is done."""
+    get_ingestion_worker()
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job_id '{job_id}'"}), 404
 
-        logger.debug(f"Received data: {data}")
+    status = {name: job[name] for name in ("job_id", "status", "pages", "chunks", "session_id", "error")}
+    if "queue_position" in job:
+        status["queue_position"] = job["queue_position"]
+    return jsonify(status), 200
 
-        query = data.get("query", "").strip()
-        session_id = data.get("session_id")
+def resolve_query(data):
+    """Validate a query request; returns (query, session, conversation_chain, error response)."""
+    query = data.get("query", "").strip()
+    session_id = data.get("session_id")
 
-        if not query:
-            logger.error("Query parameter is missing.")
-            return jsonify({"error": "Query parameter is missing"}), 400
+    if not query:
+        logger.error("Query parameter is missing.")
+        return None, None, None, (jsonify({"error": "Query parameter is missing"}), 400)
 
-        if not session_id:
-            logger.error("Session ID is missing.")
-            return jsonify({"error": "Session ID is missing"}), 400
+    if not session_id:
+        logger.error("Session ID is missing.")
+        return None, None, None, (jsonify({"error": "Session ID is missing"}), 400)
 
-        if session_id not in conversation_store:
-            logger.error(f"Invalid session_id '{session_id}'")
-            return jsonify({"error": f"Invalid session_id '{session_id}'. Please upload documents again."}), 400
+    session = get_session_manager().get(session_id)
+    if session is None:
+        logger.error("Invalid session_id '%s'", session_id)
+        return None, None, None, (jsonify({"error": f"Invalid session_id '{session_id}'. Please upload documents again."}), 400)
 
-        conversation_chain = conversation_store[session_id]
+    conversation_chain = conversation_for(session.docset)
+    if conversation_chain is None:
+        return None, None, None, (jsonify({"error": "Failed to initialize conversation chain"}), 500)
+
+    return query, session, conversation_chain, None
+
+@docbot_bp.route('/query', methods=['POST'])
+def query_handler():
+    """Handle user queries and fetch relevant answers."""
+    try:
+        data = request.get_json()
+        query, session, conversation_chain, error = resolve_query(data)
+        if error:
+            return error
 
         # Correct function call
-        return handle_userinput(query, session_id, conversation_chain)
+        return handle_userinput(query, session, conversation_chain)
+
+    except Exception as e:
+        logger.error("Error processing query: %s", e, exc_info=True)
+        return jsonify({"error": str(e)}), 500
 
+@docbot_bp.route('/query/stream', methods=['POST'])
+def query_stream_handler():
+    """Stream the answer as Server-Sent Events: source metadata first, then tokens."""
+    try:
+        query, session, conversation_chain, error = resolve_query(request.get_json())
+        if error:
+            return error
+
+        return Response(
+            stream_with_context(stream_userinput(query, session, conversation_chain)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
     except Exception as e:
-        logger.error(f"Error processing query: {str(e)}", exc_info=True)
+        logger.error("Error processing query: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+@docbot_bp.route('/metrics', methods=['GET'])
+def metrics_handler():
+    """Embedding and answer cache hit rates, resident sessions, ingestion jobs and stage latencies."""
+    return jsonify({
+        "embedding_cache": get_embedding_cache().stats(),
+        "sessions": get_session_manager().stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "ingestion_jobs": get_job_queue().stats(),
+        "latency": {name: stats for name, stats in latency.summary().items() if name.startswith(("docbot.", "docbot_ingest."))},
+    }), 200
+
 @docbot_bp.route('/')
 def docbot_home():
     return render_template('docbot.html')
\ No newline at end of file
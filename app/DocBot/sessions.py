@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from app.metrics import registry
+from app.settings import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SESSION_DB_PATH = os.getenv("DOCBOT_SESSION_DB", os.path.join(CACHE_DIR, "docbot_sessions.sqlite3"))
+
+# Sessions idle for longer than this are dropped, in memory and on disk
+SESSION_IDLE_TTL = float(os.getenv("DOCBOT_SESSION_TTL_SECONDS", "3600"))
+
+# Sessions kept resident per worker, and the memory they may use; the rest are spilled to disk
+MAX_RESIDENT_SESSIONS = int(os.getenv("DOCBOT_MAX_RESIDENT_SESSIONS", "256"))
+SESSION_MEMORY_BUDGET = int(os.getenv("DOCBOT_SESSION_MEMORY_MB", "64")) * 1024 * 1024
+
+# Chat history sent with each question: the last N turns, trimmed to a character budget
+HISTORY_TURNS = int(os.getenv("DOCBOT_HISTORY_TURNS", "6"))
+HISTORY_MAX_CHARS = int(os.getenv("DOCBOT_HISTORY_MAX_CHARS", "4000"))
+
+
+class DocBotSession:
+    """One DocBot conversation: the document set it searches and a windowed chat history."""
+
+    __slots__ = ("session_id", "docset", "history", "turns", "last_used")
+
+    def __init__(self, session_id, docset, history=None, turns=0, last_used=None):
+        self.session_id = session_id
+        self.docset = docset
+        self.history = history or []
+        self.turns = turns
+        self.last_used = last_used or time.time()
+
+    def add_turn(self, question, answer):
+        self.history.append((question, answer))
+        del self.history[:-HISTORY_TURNS]
+        self.turns += 1
+        self.last_used = time.time()
+
+    def chat_history(self, max_chars=HISTORY_MAX_CHARS):
+        """Most recent turns (oldest first) whose combined length fits ``max_chars``."""
+        selected = []
+        used = 0
+        for question, answer in reversed(self.history):
+            used += len(question) + len(answer)
+            if selected and used > max_chars:
+                break
+            selected.insert(0, (question, answer))
+        return selected
+
+    def nbytes(self):
+        return sys.getsizeof(self) + sum(sys.getsizeof(q) + sys.getsizeof(a) for q, a in self.history)
+
+
+class SessionStore:
+    """Session state in SQLite (WAL), so any worker can serve, spill or rehydrate any session."""
+
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations (session_id TEXT PRIMARY KEY, docset_id TEXT NOT NULL, "
+            "history TEXT NOT NULL, turns INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS conversations_last_used ON conversations (last_used)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, session):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO conversations (session_id, docset_id, history, turns, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (session.session_id, session.docset, json.dumps(session.history), session.turns, session.last_used),
+        )
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT docset_id, history, turns, last_used FROM conversations WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        docset, history, turns, last_used = row
+        return DocBotSession(session_id, docset, [tuple(turn) for turn in json.loads(history)], turns, last_used)
+
+    def version(self, session_id):
+        """Number of turns stored for a session, or None if it is unknown."""
+        row = self._connection().execute(
+            "SELECT turns FROM conversations WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, session_id):
+        self._connection().execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+
+    def purge_idle(self, older_than):
+        return self._connection().execute("DELETE FROM conversations WHERE last_used < ?", (older_than,)).rowcount
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+class SessionManager:
+    """Bounded set of resident DocBot sessions backed by a SessionStore.
+
+    Sessions are evicted least-recently-used first when there are more than
+    ``max_resident`` of them or their history exceeds ``memory_budget`` bytes, and
+    dropped entirely after ``idle_ttl`` seconds without a question. Evicted sessions
+    are spilled to the store and rehydrated on their next question, in this worker or
+    any other. Each turn is also written through, so a resident copy that another
+    worker has moved on from is detected and reloaded.
+    """
+
+    def __init__(self, store=None, idle_ttl=SESSION_IDLE_TTL, max_resident=MAX_RESIDENT_SESSIONS,
+                 memory_budget=SESSION_MEMORY_BUDGET):
+        self.store = store or SessionStore()
+        self.idle_ttl = idle_ttl
+        self.max_resident = max_resident
+        self.memory_budget = memory_budget
+        self.evictions = 0
+        self.expirations = 0
+        self.rehydrations = 0
+        self._sessions = OrderedDict()
+        self._bytes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def create(self, docset):
+        session = DocBotSession(str(uuid.uuid4()), docset)
+        self.store.save(session)
+        self._admit(session)
+        purged = self.store.purge_idle(time.time() - self.idle_ttl)
+        if purged:
+            self.expirations += purged
+            logger.info("Purged %s idle DocBot sessions", purged)
+        return session
+
+    def get(self, session_id):
+        """Return the session, rehydrating it from the store if needed, or None if unknown or expired."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+        stored_turns = self.store.version(session_id)
+
+        if session is not None and session.turns == stored_turns and now - session.last_used <= self.idle_ttl:
+            session.last_used = now
+            with self._lock:
+                if session_id in self._sessions:
+                    self._sessions.move_to_end(session_id)
+            return session
+
+        self._discard(session_id)
+        if stored_turns is None:
+            return None
+        session = self.store.load(session_id)
+        if session is None or now - session.last_used > self.idle_ttl:
+            self.store.delete(session_id)
+            self.expirations += 1
+            return None
+        session.last_used = now
+        self.rehydrations += 1
+        self._admit(session)
+        return session
+
+    def record_turn(self, session, question, answer):
+        session.add_turn(question, answer)
+        self.store.save(session)
+        self._admit(session)
+
+    def _admit(self, session):
+        spilled = []
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._sessions.move_to_end(session.session_id)
+            nbytes = session.nbytes()
+            self._total_bytes += nbytes - self._bytes.get(session.session_id, 0)
+            self._bytes[session.session_id] = nbytes
+            now = time.time()
+            # Oldest first: idle sessions expire, then the least recently used spill until within budget
+            while len(self._sessions) > 1:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                idle = now - oldest.last_used > self.idle_ttl
+                if not idle and len(self._sessions) <= self.max_resident and self._total_bytes <= self.memory_budget:
+                    break
+                del self._sessions[oldest_id]
+                self._total_bytes -= self._bytes.pop(oldest_id)
+                if idle:
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+                    spilled.append(oldest)
+        for evicted in spilled:
+            # Persist the latest last_used so the spilled copy expires on the right schedule
+            self.store.save(evicted)
+
+    def _discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._total_bytes -= self._bytes.pop(session_id, 0)
+
+    def stats(self):
+        with self._lock:
+            resident, resident_bytes = len(self._sessions), self._total_bytes
+        return {
+            "resident_sessions": resident,
+            "resident_bytes": resident_bytes,
+            "max_resident": self.max_resident,
+            "memory_budget_bytes": self.memory_budget,
+            "stored_sessions": self.store.count(),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rehydrations": self.rehydrations,
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager()
+        return _manager
+
+
+registry.gauge("docbot_resident_sessions", "DocBot conversations held in memory.",
+               lambda: len(_manager._sessions) if _manager else None)
+registry.gauge("docbot_resident_session_bytes", "Estimated memory of resident DocBot conversations.",
+               lambda: _manager._total_bytes if _manager else None)
@@ -1,23 +1,55 @@
 from flask import Flask, render_template, request, session, redirect, url_for, flash
+import gc
 import os
-from flask_sqlalchemy import SQLAlchemy
-from app.models import db, Student, Staff  # Import models
-from app.infobot import infobot_bp
-from app.DocBot import docbot_bp
+from app.models import db  # Import models
+from app.users import user_repository, engine_options, tune_sqlite, USER_DATABASE_URI
 
 
+def warmup():
+    """Load models, indexes and heavy libraries now instead of on first use.
+
+    Call it in a pre-fork server's master (e.g. gunicorn --preload with
+    INFOBOT_WARMUP=1) so forked workers share the loaded pages copy-on-write.
+    """
+    from app.infobot.routes import warmup as warmup_infobot
+    from app.DocBot.demo_page import warmup as warmup_docbot
+
+    warmup_infobot()
+    warmup_docbot()
+    # Keep the garbage collector from touching (and so un-sharing) these objects after fork
+    gc.freeze()
+
 
 def create_app():
+    from app.logging_config import configure_logging
+
+    configure_logging()  # before the blueprints import, so their startup messages use it
+
+    # Blueprints are imported here rather than at module level so importing the
+    # package stays cheap; their models load lazily on first use
+    from app.infobot import infobot_bp
+    from app.DocBot import docbot_bp
+    from app.routes import setup_routes
+    from app import metrics
+
     app = Flask(__name__)
     app.secret_key = os.urandom(24)
 
     # Database configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = USER_DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
+
+    if os.getenv("INFOBOT_WARMUP") == "1":
+        warmup()
 
     app.register_blueprint(infobot_bp, url_prefix='/infobot')
     app.register_blueprint(docbot_bp, url_prefix='/docbot')
+    setup_routes(app)  # Speech-to-text and text-to-speech endpoints
+    metrics.install(app)  # Request histograms and the Prometheus /metrics endpoint
     db.init_app(app)  # Initialize SQLAlchemy with the app
+    with app.app_context():
+        tune_sqlite(db.engine)
 
     @app.route('/')
     def home():
@@ -34,32 +66,21 @@ def create_app():
             name = request.form['name']
             email = request.form['email']
 
+            # Duplicates are caught by the unique constraints on insert, not by a lookup first
             if user_type == 'student':
-                usn = request.form['usn']
-                batch = request.form['batch']
-                branch = request.form['branch']
-                pass_out_year = request.form['pass_out_year']
-
-                existing_student = Student.query.filter((Student.email == email) | (Student.usn == usn)).first()
-                if existing_student:
+                registered = user_repository.register_student(
+                    name=name, email=email, usn=request.form['usn'], batch=request.form['batch'],
+                    branch=request.form['branch'], pass_out_year=request.form['pass_out_year'])
+                if not registered:
                     flash("Email or USN already registered!", "danger")
                     return redirect(url_for('register'))
 
-                new_student = Student(name=name, batch=batch, usn=usn, email=email, branch=branch, pass_out_year=pass_out_year)
-                db.session.add(new_student)
-
             elif user_type == 'staff':
-                unique_id = request.form['unique_id']
-
-                existing_staff = Staff.query.filter((Staff.email == email) | (Staff.unique_id == unique_id)).first()
-                if existing_staff:
+                registered = user_repository.register_staff(name=name, email=email, unique_id=request.form['unique_id'])
+                if not registered:
                     flash("Email or Unique ID already registered!", "danger")
                     return redirect(url_for('register'))
 
-                new_staff = Staff(name=name, unique_id=unique_id, email=email)
-                db.session.add(new_staff)
-
-            db.session.commit()
             flash("Registration successful!", "success")
             return redirect(url_for('login'))
 
@@ -71,19 +92,11 @@ def create_app():
             email = request.form['email']
             usn = request.form['usn']  # USN for students, Unique ID for staff
 
-            # Check Student Table
-            student = Student.query.filter_by(email=email, usn=usn).first()
-            if student:
-                session['user'] = email
-                session['user_type'] = 'student'
-                flash("Login Successful!", "success")
-                return redirect(url_for('staff_chat'))  # ✅ Redirect to Infobot (staff_chat.html)
-
-            # Check Staff Table
-            staff = Staff.query.filter_by(email=email, unique_id=usn).first()
-            if staff:
-                session['user'] = email
-                session['user_type'] = 'staff'
+            # One query over the Student and Staff tables (cached briefly after success)
+            identity = user_repository.authenticate(email, usn)
+            if identity:
+                session['user'] = identity.email
+                session['user_type'] = identity.user_type
                 flash("Login Successful!", "success")
                 return redirect(url_for('staff_chat'))  # ✅ Redirect to Infobot (staff_chat.html)
 
@@ -0,0 +1,89 @@
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Dotted numbers such as section "4.2.1", which \w+ would split into separate digits
+_DOTTED_NUMBER = re.compile(r"\b\d+(?:\.\d+)+\b")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "the their there this to was what when where which who will with you your".split()
+)
+
+
+def tokenize(text, keep_codes=False):
+    """Lowercase word tokens without common English stopwords.
+
+    With ``keep_codes``, dotted numbers (section numbers, versions) are also emitted
+    whole, so "4.2" matches "section 4.2" exactly rather than any 4 and any 2.
+    """
+    text = text.lower()
+    tokens = [token for token in _TOKEN.findall(text) if token not in STOPWORDS]
+    if keep_codes:
+        tokens.extend(_DOTTED_NUMBER.findall(text))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over an in-memory inverted index.
+
+    Postings map each term to (document id, term frequency) pairs, so a query only
+    touches the documents that contain at least one of its terms.
+    """
+
+    def __init__(self, documents=(), k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_lengths = []
+        for tokens in documents:
+            self.add(tokens)
+
+    def add(self, tokens):
+        """Index one tokenized document and return its id."""
+        doc_id = len(self.doc_lengths)
+        self.doc_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            self.postings[term].append((doc_id, tf))
+        return doc_id
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.doc_lengths) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query_tokens):
+        """Return {doc_id: score} for every document matching any query term."""
+        if not self.doc_lengths:
+            return {}
+        avg_length = sum(self.doc_lengths) / len(self.doc_lengths)
+        scores = defaultdict(float)
+        for term in set(query_tokens):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query_tokens, k=10):
+        """Top ``k`` (doc_id, score) pairs, best first."""
+        return heapq.nlargest(k, self.scores(query_tokens).items(), key=lambda item: item[1])
+
+    def to_dict(self):
+        return {"k1": self.k1, "b": self.b, "doc_lengths": self.doc_lengths, "postings": dict(self.postings)}
+
+    @classmethod
+    def from_dict(cls, data):
+        index = cls(k1=data["k1"], b=data["b"])
+        index.doc_lengths = list(data["doc_lengths"])
+        for term, postings in data["postings"].items():
+            index.postings[term] = [tuple(posting) for posting in postings]
+        return index
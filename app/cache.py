@@ -0,0 +1,187 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+_PUNCTUATION_EDGES = re.compile(r"^[\s\W_]+|[\s\W_]+$", re.UNICODE)
+
+
+def normalize_query(query):
+    """Lowercase, collapse whitespace and drop leading/trailing punctuation."""
+    return _PUNCTUATION_EDGES.sub("", " ".join(query.lower().split()))
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with optional per-entry TTL and hit counters."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def values(self):
+        """Snapshot of the cached values, expired entries included, without touching LRU order."""
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class SQLiteCache:
+    """Persistent key/value cache in a SQLite file, safe to share between worker processes.
+
+    Values are stored as text with an optional expiry timestamp. Each thread gets its
+    own connection and the database runs in WAL mode so readers never block writers.
+    With ``max_rows``, the oldest written rows beyond that many are deleted on write.
+    The trim scans the newest ``max_rows`` rows, so a process runs it once per 1% of
+    ``max_rows`` writes, and the table can briefly exceed the cap by that much per
+    process.
+    """
+
+    def __init__(self, path, table="cache", max_rows=None):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._writes = 0
+        self._trim_every = max(1, max_rows // 100) if max_rows else None
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        try:
+            row = self._connection().execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        try:
+            self._connection().execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+        except sqlite3.Error:
+            return  # a busy or read-only cache must never fail the request
+        self._wrote(1)
+
+    def set_many(self, items, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, value, expires_at) for key, value in items],
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return
+        self._wrote(len(items))
+
+    def _wrote(self, count):
+        if self.max_rows is None:
+            return
+        # Unsynchronised like the hit counters: a lost increment only delays a trim
+        before = self._writes
+        self._writes += count
+        if before // self._trim_every != self._writes // self._trim_every:
+            self.trim()
+
+    def trim(self):
+        """Delete all but the ``max_rows`` most recently written rows (INSERT OR REPLACE
+        gives a rewritten key a new rowid, so rowid order is write order)."""
+        try:
+            cursor = self._connection().execute(
+                f"DELETE FROM {self.table} WHERE rowid <= "
+                f"(SELECT rowid FROM {self.table} ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+                (self.max_rows,),
+            )
+            self.evicted += max(cursor.rowcount, 0)
+        except sqlite3.Error:
+            pass
+
+    def purge_expired(self):
+        try:
+            self._connection().execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evicted": self.evicted,
+        }
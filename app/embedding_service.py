@@ -0,0 +1,268 @@
+import os
+import time
+import queue
+import logging
+import argparse
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+import numpy as np
+from app.embeddings_base import Embeddings
+from app.metrics import registry
+from app.settings import CACHE_DIR, EMBEDDING_MODEL_NAME
+
+# Unix socket of a shared embedding sidecar; when set, workers send encode calls there
+# instead of loading their own copy of the model
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET", "")
+
+# Shared secret for the sidecar. The connection carries pickles, so there is no
+# default: both ends refuse to run without one
+EMBEDDING_SERVICE_AUTHKEY = os.getenv("EMBEDDING_SERVICE_AUTHKEY", "").encode("utf-8")
+
+# Calls with at most this many texts are micro-batched with concurrent callers
+MICRO_BATCH_MAX_TEXTS = 8
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingService(Embeddings):
+    """Shared sentence-transformers model that micro-batches concurrent small requests.
+
+    Small ``encode`` calls (single queries, mostly) are queued and a worker thread
+    encodes everything that arrives within ``batch_window`` seconds, up to
+    ``max_batch`` texts, in one forward pass. Larger calls are already batches and go
+    straight to the model. ``encode`` mirrors ``SentenceTransformer.encode`` for the
+    arguments this app uses and always returns float32 numpy arrays.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME, max_batch=64, batch_window=0.005):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                    logging.info("✅ Loaded embedding model '%s'", self.model_name)
+        return self._model
+
+    def _encode_now(self, texts):
+        return np.asarray(self.model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so a forked worker starts its own batcher
+        if self._worker is None or self._worker_pid != os.getpid():
+            with self._model_lock:
+                if self._worker is None or self._worker_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._worker_pid = os.getpid()
+                    self._worker = threading.Thread(target=self._batch_loop, args=(self._queue,),
+                                                    name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _batch_loop(self, requests):
+        while True:
+            batch = [requests.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                vectors = self._encode_now([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def _encode_batched(self, texts):
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return np.stack([future.result() for future in futures])
+
+    def encode(self, sentences, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if len(texts) <= MICRO_BATCH_MAX_TEXTS:
+            vectors = self._encode_batched(texts)
+        else:
+            vectors = self._encode_now(texts)
+        if normalize_embeddings:
+            vectors = normalize(vectors)
+        return vectors[0] if single else vectors
+
+    def warmup(self):
+        """Load the model now, e.g. before a pre-fork server forks its workers."""
+        self.encode(["warm up"])
+        return self
+
+    # Embeddings interface
+    def fit(self, texts):
+        return self
+
+    def transform(self, text):
+        return self.embed_query(text)
+
+    def embed_documents(self, texts):
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.encode(text).tolist()
+
+    def __call__(self, text):
+        return self.embed_query(text)
+
+
+def require_authkey(authkey):
+    if not authkey:
+        raise RuntimeError("EMBEDDING_SERVICE_AUTHKEY must be set to use the embedding sidecar")
+    return authkey
+
+
+def runtime_dir():
+    """Private (0700) directory for the sidecar socket: $XDG_RUNTIME_DIR/infobot, else CACHE_DIR/run."""
+    base = os.getenv("XDG_RUNTIME_DIR")
+    directory = os.path.join(base, "infobot") if base else os.path.join(CACHE_DIR, "run")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.chmod(directory, 0o700)
+    return directory
+
+
+def default_socket_path():
+    return os.path.join(runtime_dir(), "embeddings.sock")
+
+
+def _check_socket_dir(address):
+    # A directory others can write to lets them replace the socket with their own
+    status = os.stat(os.path.dirname(os.path.abspath(address)))
+    if status.st_uid != os.getuid() or status.st_mode & 0o022:
+        raise RuntimeError(f"Refusing to use {address}: its directory must be owned by this user "
+                           f"and not group- or world-writable")
+
+
+class RemoteEmbeddingService(EmbeddingService):
+    """Client for an embedding sidecar started with ``python -m app.embedding_service --serve``."""
+
+    def __init__(self, address=EMBEDDING_SERVICE_SOCKET, authkey=EMBEDDING_SERVICE_AUTHKEY):
+        super().__init__()
+        require_authkey(authkey)
+        _check_socket_dir(address)
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, never shared with a forked child
+        conn, pid = getattr(self._local, "conn", None), getattr(self._local, "pid", None)
+        if conn is None or pid != os.getpid():
+            conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.pid = os.getpid()
+        return conn
+
+    def encode(self, sentences, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        conn = self._connection()
+        try:
+            conn.send((sentences, normalize_embeddings))
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise
+        if status != "ok":
+            raise RuntimeError(f"Embedding service error: {payload}")
+        return payload
+
+    def warmup(self):
+        self._connection()
+        return self
+
+
+def serve(address=EMBEDDING_SERVICE_SOCKET, authkey=EMBEDDING_SERVICE_AUTHKEY):
+    """Run the embedding sidecar: one connection thread per client, one shared batcher."""
+    require_authkey(authkey)
+    address = address or default_socket_path()
+    _check_socket_dir(address)
+    service = EmbeddingService().warmup()
+    if os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    os.chmod(address, 0o600)
+    logging.info("🧠 Embedding service listening on %s", address)
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    sentences, normalize_embeddings = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", service.encode(sentences, normalize_embeddings=normalize_embeddings)))
+                except Exception as e:
+                    conn.send(("error", str(e)))
+
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service():
+    """The process-wide embedding service: the sidecar client if configured, else a local model."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RemoteEmbeddingService() if EMBEDDING_SERVICE_SOCKET else EmbeddingService()
+    return _service
+
+
+def _embedding_model_bytes():
+    # Only reports a model this process has already loaded; never loads one for a scrape
+    model = getattr(_service, "_model", None)
+    if model is None:
+        return None
+    return sum(parameter.numel() * parameter.element_size() for parameter in model.parameters())
+
+
+registry.gauge("embedding_model_bytes", "Parameter memory of the embedding model loaded in this process.", _embedding_model_bytes)
+
+
+if __name__ == "__main__":
+    # EMBEDDING_SERVICE_AUTHKEY=... python -m app.embedding_service --serve
+    parser = argparse.ArgumentParser(description="Shared embedding sidecar for Infobot workers.")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--socket", default=EMBEDDING_SERVICE_SOCKET,
+                        help="socket path (default: embeddings.sock in a private runtime directory)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.serve:
+        serve(args.socket)
+    else:
+        parser.print_help()
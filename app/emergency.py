@@ -1,45 +1,37 @@
 import logging
-import urllib
+import urllib.parse
 
-import requests
-from bs4 import BeautifulSoup
+from app.fetch import fetcher
+
+
+def extract_articles(soup):
+    # More specific extraction based on observed HTML structure
+    results = soup.find_all('article')  # Update this based on actual site structure
+    logging.debug("Results found: %d", len(results))
+    return [result.get_text(strip=True) for result in results[:3]]  # Limit to first 3 results
 
 
 def scrape_website(query):
     try:
         search_query = urllib.parse.quote(query)
         search_url = f'https://klsvdit.edu.in/?s={search_query}'
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"}
-
-        response = requests.get(search_url, headers=headers)
-        logging.debug(f"HTTP Status Code: {response.status_code}")
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
 
-            # Log the HTML content to see what we're working with
-            logging.debug(f"HTML Content: {soup.prettify()}")
+        # Shared pooled session; the parsed result is cached per search URL
+        status_code, extracted_texts = fetcher.extract(search_url, extract_articles, timeout=10)
+        logging.debug("HTTP Status Code: %s", status_code)
 
-            # More specific extraction based on observed HTML structure
-            results = soup.find_all('article')  # Update this based on actual site structure
-            logging.debug(f"Results found: {len(results)}")
-
-            if results:
-                extracted_texts = [result.get_text(strip=True) for result in results[:3]]
-                logging.debug(f"Extracted Texts: {extracted_texts}")
-                return "\n\n".join(extracted_texts)  # Limit to first 3 results
+        if status_code == 200:
+            if extracted_texts:
+                logging.debug("Extracted %d texts", len(extracted_texts))
+                return "\n\n".join(extracted_texts)
 
             return "No relevant information found on the website."
 
-        elif response.status_code == 406:
+        elif status_code == 406:
             return "The website is rejecting requests. Try accessing it manually."
 
-        return f"Failed to retrieve information (Status Code: {response.status_code})"
+        return f"Failed to retrieve information (Status Code: {status_code})"
 
     except Exception as e:
-        logging.error(f"Error in scrape_website: {str(e)}")
+        logging.error("Error in scrape_website: %s", e)
         return f"An error occurred: {str(e)}"
-
-
-logging.basicConfig(level=logging.DEBUG)
@@ -0,0 +1,135 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from app.cache import LRUCache
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"
+
+# lxml is several times faster than the pure-Python html.parser; use it when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def make_soup(content):
+    return BeautifulSoup(content, HTML_PARSER)
+
+
+def extract_sections(soup):
+    """Text of every heading and paragraph on a page."""
+    sections = []
+    for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'p']):
+        text = tag.get_text(separator="\n").strip()
+        if text:
+            sections.append(text)
+    return sections
+
+
+class Page:
+    """A fetched page, its HTTP validators and the values extracted from it."""
+
+    def __init__(self, content, etag=None, last_modified=None):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+        self.extracted = {}
+        self.lock = threading.Lock()
+
+
+class PageFetcher:
+    """Shared HTTP fetch layer for scraping.
+
+    Uses one pooled ``requests.Session``, revalidates pages with ETag /
+    Last-Modified instead of downloading them again, and keeps what was extracted
+    from a page for ``page_ttl`` seconds so it is parsed once per TTL rather than
+    once per query. ``extract_many`` fetches several URLs concurrently under a
+    single deadline.
+    """
+
+    def __init__(self, pool_size=8, page_ttl=300, max_pages=256):
+        self.page_ttl = page_ttl
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pages = LRUCache(maxsize=max_pages)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="fetch")
+        self.not_modified = 0
+
+    def fetch(self, url, timeout=5, cache=True):
+        """Return (status_code, Page or None), revalidating any cached copy of the page.
+
+        With ``cache=False`` the page is downloaded outright and not kept, for bulk
+        reads such as a crawl that would otherwise evict the pages queries use.
+        """
+        page = self.pages.get(url) if cache else None
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and page is not None:
+            self.not_modified += 1
+            page.fetched_at = time.monotonic()
+            return 200, page
+        if response.status_code != 200:
+            return response.status_code, None
+
+        page = Page(response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if cache:
+            self.pages.set(url, page)
+        return 200, page
+
+    def extract(self, url, extractor, timeout=5):
+        """Return (status_code, extractor(soup)) for a page, parsing it at most once per TTL."""
+        name = extractor.__name__
+        page = self.pages.get(url)
+        if page is None or time.monotonic() - page.fetched_at >= self.page_ttl:
+            status_code, page = self.fetch(url, timeout=timeout)
+            if page is None:
+                return status_code, None
+
+        with page.lock:
+            if name not in page.extracted:
+                page.extracted[name] = extractor(make_soup(page.content))
+            return 200, page.extracted[name]
+
+    def extract_many(self, urls, extractor, deadline=5):
+        """Extract from several URLs concurrently; returns {url: value} for pages ready by the deadline."""
+        futures = {self.executor.submit(self.extract, url, extractor, deadline): url for url in urls}
+        done, not_done = wait(futures, timeout=deadline)
+
+        results = {}
+        for future in done:
+            url = futures[future]
+            try:
+                status_code, value = future.result()
+            except requests.exceptions.Timeout:
+                logging.error("⏳ Request to %s timed out", url)
+                continue
+            except requests.exceptions.RequestException as e:
+                logging.error("❌ Error fetching %s: %s", url, e)
+                continue
+            if value is None:
+                logging.warning("⚠️ Failed to retrieve %s (Status Code: %s)", url, status_code)
+                continue
+            results[url] = value
+
+        for future in not_done:
+            future.cancel()
+            logging.error("⏳ Request to %s missed the %ss deadline", futures[future], deadline)
+        return results
+
+
+fetcher = PageFetcher()
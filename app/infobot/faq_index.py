@@ -0,0 +1,101 @@
+import os
+import glob
+import hashlib
+import logging
+import numpy as np
+from app.knowledge_store import knowledge_store, faq_dataset
+from app.metrics import registry
+from app.settings import CACHE_DIR, EMBEDDING_MODEL_NAME
+
+
+class FaqEmbeddingIndex:
+    """Normalized float32 matrix of FAQ question embeddings, persisted on disk.
+
+    The matrix is stored as ``faq_<name>_<digest>.npy`` in the cache directory,
+    where the digest covers the FAQ file contents and the model name, and is
+    memory-mapped on load so every worker shares the same pages.
+    """
+
+    def __init__(self, name, faqs, digest, encoder, cache_dir=CACHE_DIR, model_name=EMBEDDING_MODEL_NAME):
+        self.name = name
+        self.questions = list(faqs.keys())
+        self.answers = list(faqs.values())
+        self.encoder = encoder
+        self.cache_dir = cache_dir
+        self.digest = hashlib.sha256(f"{model_name}:{digest}".encode("utf-8")).hexdigest()[:16]
+        self.matrix = self._load_or_build()
+
+    @property
+    def path(self):
+        return os.path.join(self.cache_dir, f"faq_{self.name}_{self.digest}.npy")
+
+    def _encode(self, texts):
+        vectors = self.encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _load_or_build(self):
+        if not self.questions:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        if os.path.exists(self.path):
+            matrix = np.load(self.path, mmap_mode="r")
+            if matrix.shape[0] == len(self.questions):
+                logging.info("✅ Loaded FAQ embeddings for '%s' from %s", self.name, self.path)
+                return matrix
+            logging.warning("⚠️ Stale FAQ embedding matrix at %s, rebuilding", self.path)
+
+        matrix = self._encode(self.questions)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, self.path)
+        self._remove_stale()
+        logging.info("✅ Built FAQ embeddings for '%s' (%s questions)", self.name, len(self.questions))
+        return np.load(self.path, mmap_mode="r")
+
+    def _remove_stale(self):
+        for path in glob.glob(os.path.join(self.cache_dir, f"faq_{self.name}_*.npy")):
+            if path != self.path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def search(self, query):
+        """Return (answer, score) for the closest FAQ question, or (None, 0.0)."""
+        if not self.questions:
+            return None, 0.0
+        query_vector = self._encode([query])[0]
+        scores = self.matrix @ query_vector
+        best_idx = int(np.argmax(scores))
+        return self.answers[best_idx], float(scores[best_idx])
+
+
+def embedding_index(audience, encoder):
+    """Embedding index for an audience's FAQs, rebuilt when the FAQ file changes."""
+    return knowledge_store.derived(
+        faq_dataset(audience), "embeddings",
+        lambda snapshot: FaqEmbeddingIndex(audience, snapshot.data, snapshot.digest, encoder),
+    )
+
+
+def _faq_matrix_bytes():
+    return {
+        (("dataset", name),): value.matrix.nbytes
+        for (name, key), value in knowledge_store.derived_values()
+        if isinstance(value, FaqEmbeddingIndex)
+    }
+
+
+registry.gauge("faq_embedding_matrix_bytes", "Size of loaded FAQ embedding matrices (memory-mapped).", _faq_matrix_bytes)
+
+
+if __name__ == "__main__":
+    # Build-time entry point: python -m app.infobot.faq_index
+    from app.embedding_service import get_embedding_service
+
+    logging.basicConfig(level=logging.INFO)
+    model = get_embedding_service()
+    for audience in ("staff", "visitor"):
+        embedding_index(audience, model)
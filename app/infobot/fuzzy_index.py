@@ -0,0 +1,68 @@
+from collections import Counter, defaultdict
+from fuzzywuzzy import fuzz, process, utils
+from app.knowledge_store import knowledge_store, faq_dataset
+
+MATCH_THRESHOLD = 65
+
+
+def char_ngrams(text, n=3):
+    """Character n-grams of a processed string, padded so short words still produce grams."""
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+class FuzzyFaqIndex:
+    """Fuzzy matcher over FAQ questions with a character n-gram inverted index.
+
+    Questions are normalized once with ``utils.full_process`` (the same processor
+    ``process.extractOne`` applies per call), the index prunes large FAQ sets to a
+    shortlist of questions sharing the most n-grams with the query, and the
+    shortlist is scored with ``fuzz.partial_ratio`` in one ``extractOne`` call.
+    FAQ sets no larger than ``shortlist_size`` are scored in full, so results are
+    identical to checking every question one at a time.
+    """
+
+    def __init__(self, faqs, shortlist_size=200, ngram=3):
+        self.questions = list(faqs.keys())
+        self.answers = list(faqs.values())
+        self.shortlist_size = shortlist_size
+        self.ngram = ngram
+        self.processed = [utils.full_process(question) for question in self.questions]
+        self.postings = defaultdict(list)
+        for idx, text in enumerate(self.processed):
+            for gram in char_ngrams(text, ngram):
+                self.postings[gram].append(idx)
+
+    def candidates(self, processed_query):
+        """Return FAQ ids worth scoring for the query, in FAQ file order."""
+        if len(self.processed) <= self.shortlist_size:
+            return range(len(self.processed))
+
+        overlap = Counter()
+        for gram in char_ngrams(processed_query, self.ngram):
+            overlap.update(self.postings.get(gram, ()))
+        return sorted(idx for idx, _ in overlap.most_common(self.shortlist_size))
+
+    def best_match(self, query):
+        """Return (answer, score) for the best scoring question, or (None, 0)."""
+        processed_query = utils.full_process(query)
+        choices = {idx: self.processed[idx] for idx in self.candidates(processed_query)}
+        if not choices:
+            return None, 0
+
+        # Choices are already processed, so skip the per-choice processor
+        best = process.extractOne(processed_query, choices, processor=None, scorer=fuzz.partial_ratio)
+        if not best:
+            return None, 0
+        _, score, idx = best
+        return self.answers[idx], score
+
+    def match(self, query, threshold=MATCH_THRESHOLD):
+        """Return the answer of the best match scoring at least ``threshold``."""
+        answer, score = self.best_match(query)
+        return answer if score >= threshold else None
+
+
+def fuzzy_index(audience):
+    """Fuzzy index for an audience's FAQs, rebuilt when the FAQ file changes."""
+    return knowledge_store.derived(faq_dataset(audience), "fuzzy", lambda snapshot: FuzzyFaqIndex(snapshot.data))
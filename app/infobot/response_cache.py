@@ -0,0 +1,61 @@
+import os
+import hashlib
+from app.cache import LRUCache, SQLiteCache, normalize_query
+from app.knowledge_store import knowledge_store, faq_dataset
+from app.settings import CACHE_DIR
+
+# Answers from the FAQs only change with the FAQ files, which are part of the key;
+# scraped answers and fallbacks depend on the live website and expire sooner
+FAQ_ANSWER_TTL = int(os.getenv("INFOBOT_FAQ_ANSWER_TTL", 24 * 3600))
+SCRAPED_ANSWER_TTL = int(os.getenv("INFOBOT_SCRAPED_ANSWER_TTL", 15 * 60))
+
+# Set INFOBOT_RESPONSE_CACHE to an empty string to keep the cache per process
+SHARED_CACHE_PATH = os.getenv("INFOBOT_RESPONSE_CACHE", os.path.join(CACHE_DIR, "responses.sqlite3"))
+
+# Rows kept in the shared cache; the oldest written are evicted beyond this
+SHARED_CACHE_ROWS = int(os.getenv("INFOBOT_RESPONSE_CACHE_ROWS", "50000"))
+
+class ResponseCache:
+    """Final /infobot/query responses keyed by normalized query, language, audience and FAQ version.
+
+    Entries live in a size-bounded in-memory LRU and, optionally, in a SQLite file
+    shared by every worker process and capped at ``shared_rows`` rows. Because the FAQ file digest is part of the key,
+    editing an FAQ file makes every older entry unreachable without explicit purging.
+    """
+
+    def __init__(self, memory_size=2048, shared_path=SHARED_CACHE_PATH, shared_rows=SHARED_CACHE_ROWS):
+        self.memory = LRUCache(maxsize=memory_size)
+        self.shared = SQLiteCache(shared_path, table="responses", max_rows=shared_rows) if shared_path else None
+        self._writes = 0
+
+    def key(self, query, language, audience):
+        digest = knowledge_store.snapshot(faq_dataset(audience)).digest
+        raw = "\x1f".join((normalize_query(query), language, audience, digest))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        response = self.memory.get(key)
+        if response is None and self.shared is not None:
+            response = self.shared.get(key)
+            if response is not None:
+                self.memory.set(key, response, ttl=SCRAPED_ANSWER_TTL)
+        return response
+
+    def set(self, key, response, source):
+        """Store a response; ``source`` is the pipeline stage that produced it."""
+        ttl = FAQ_ANSWER_TTL if source in ("faq", "semantic") else SCRAPED_ANSWER_TTL
+        self.memory.set(key, response, ttl=ttl)
+        if self.shared is not None:
+            self.shared.set(key, response, ttl=ttl)
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self.shared.purge_expired()
+
+    def stats(self):
+        stats = {"memory": self.memory.stats()}
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+
+response_cache = ResponseCache()
@@ -1,18 +1,21 @@
 import os
-import json
+import time
+import asyncio
 import logging
-import requests
-from flask import request, jsonify
-from fuzzywuzzy import process, fuzz
-from bs4 import BeautifulSoup
-from sentence_transformers import SentenceTransformer, util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, jsonify, session
+from fuzzywuzzy import fuzz
 from dotenv import load_dotenv
-from langdetect import detect, DetectorFactory
+from app.embedding_service import get_embedding_service
+from app.fetch import fetcher, extract_sections
 from app.infobot import infobot_bp
-from deep_translator import GoogleTranslator
-
-# Ensure consistent language detection
-DetectorFactory.seed = 0
+from app.infobot.faq_index import embedding_index
+from app.infobot.fuzzy_index import fuzzy_index, MATCH_THRESHOLD
+from app.infobot.response_cache import response_cache
+from app.infobot.site_index import site_search, SITE_URL, SITE_REFRESH_INTERVAL
+from app.infobot.translation import translation_service, start_pretranslation
+from app.metrics import latency, timed, count_answer
 
 # Load environment variables
 load_dotenv()
@@ -21,108 +24,180 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     logging.warning("⚠️ GROQ_API_KEY environment variable not set. Some features may not work.")
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                    handlers=[logging.StreamHandler()])
+AUDIENCES = ("staff", "visitor")
+# Shared, micro-batching embedding model (or a client for the embedding sidecar);
+# the model itself is only loaded on the first encode
+model = get_embedding_service()
 
-# Load FAQs
-def load_faqs():
-    faq_file_path = os.path.join(os.path.dirname(__file__), "..", "data", "staff_faqs.json")
-    try:
-        with open(faq_file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logging.warning(f"⚠️ FAQs file not found: {faq_file_path}")
-        return {}
-    except json.JSONDecodeError:
-        logging.error("❌ Error parsing staff_faqs.json - check its format.")
-        return {}
-
-FAQs = load_faqs()
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Executors for the async pipeline: model inference is CPU-bound, so it gets a
+# small bounded pool; translation and scraping mostly wait on the network
+CPU_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("INFOBOT_CPU_WORKERS", "2")), thread_name_prefix="infobot-cpu")
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("INFOBOT_IO_WORKERS", "32")), thread_name_prefix="infobot-io")
+
+FALLBACK_RESPONSE = "🤔 Sorry, I couldn't find the information you requested."
+
+# Scrape the live website when the local site index has no answer
+LIVE_SCRAPE = os.getenv("INFOBOT_LIVE_SCRAPE", "0") == "1"
+
+# Loads the embedding model and builds each audience's fuzzy n-gram index and
+# memory-mapped FAQ embeddings. Without it they are built on first use; the
+# knowledge store rebuilds them whenever an FAQ file changes
+def warmup():
+    model.warmup()
+    for audience in AUDIENCES:
+        fuzzy_index(audience)
+        embedding_index(audience, model)
+    site_search.reload()
+
+_background_jobs_started = False
+_background_jobs_lock = threading.Lock()
+
+# Background threads do not survive fork(), so they start on each worker's first request
+@infobot_bp.before_request
+def start_background_jobs():
+    global _background_jobs_started
+    if _background_jobs_started:
+        return
+    with _background_jobs_lock:
+        if _background_jobs_started:
+            return
+        _background_jobs_started = True
+        # Fill the translation cache with every FAQ answer in the background
+        start_pretranslation(AUDIENCES)
+        if SITE_REFRESH_INTERVAL > 0:
+            site_search.start_refresh(SITE_REFRESH_INTERVAL, encoder=model)
+
+# Picks the FAQ corpus: an explicit "audience" field wins, otherwise logged-in
+# students and staff get the staff FAQs and everyone else the visitor FAQs
+def resolve_audience(data):
+    requested = (data.get("audience") or "").strip().lower()
+    if requested in AUDIENCES:
+        return requested
+    return "staff" if session.get("user_type") in ("staff", "student") else "visitor"
 
 # Detects the language of the query
+@timed("infobot", "detect")
 def detect_language(text):
     try:
-        return detect(text)  # Returns language code (e.g., "fr", "es", "hi")
+        return translation_service.detect(text)  # Returns language code (e.g., "fr", "es", "hi")
     except Exception as e:
-        logging.warning(f"⚠️ Language detection failed: {str(e)}")
+        logging.warning("⚠️ Language detection failed: %s", e)
         return "en"  # Default to English if detection fails
 
-# Translates text to a target language
+# Translates text to a target language; returns (text, ok), where ok is False when
+# translation failed and the original text came back instead
+@timed("infobot", "translate")
 def translate_text(text, source_lang, target_lang):
     try:
         if source_lang == target_lang:
-            return text  # No translation needed
-        return GoogleTranslator(source=source_lang, target=target_lang).translate(text)
+            return text, True  # No translation needed
+        return translation_service.translate(text, source_lang, target_lang), True
     except Exception as e:
-        logging.warning(f"⚠️ Translation failed ({source_lang} ➝ {target_lang}): {str(e)}")
-        return text  # Return original text if translation fails
+        logging.warning("⚠️ Translation failed (%s ➝ %s): %s", source_lang, target_lang, e)
+        return text, False  # Return original text if translation fails
 
 # Function to match a query to the FAQ with fuzzy matching
-def match_faq(query):
-    logging.debug(f"Matching query: {query}")
-    max_ratio = 0
-    best_match_answer = None
-    for faq_question, faq_answer in FAQs.items():
-        ratio = process.extractOne(query, [faq_question], scorer=fuzz.partial_ratio)
-        if ratio and ratio[1] > max_ratio:
-            max_ratio = ratio[1]
-            best_match_answer = faq_answer
-
-    if max_ratio >= 65:
-        logging.info(f"Best match found with ratio {max_ratio}: {best_match_answer}")
+@timed("infobot", "faq")
+def match_faq(query, audience="staff"):
+    logging.debug("Matching query: %s", query)
+    best_match_answer, max_ratio = fuzzy_index(audience).best_match(query)
+
+    if max_ratio >= MATCH_THRESHOLD:
+        logging.debug("Best match found with ratio %s: %s", max_ratio, best_match_answer)
         return best_match_answer
     return None
 
 # Function to perform semantic search using Hugging Face Transformers
-def semantic_search(query):
+@timed("infobot", "semantic")
+def semantic_search(query, audience="staff"):
     try:
-        if not FAQs:
-            return None
-
-        query_embedding = model.encode(query, convert_to_tensor=True)
-        faq_questions = list(FAQs.keys())
-        faq_embeddings = model.encode(faq_questions, convert_to_tensor=True)
-
-        similarities = util.pytorch_cos_sim(query_embedding, faq_embeddings)
-        best_match_idx = similarities.argmax().item()
-
-        if similarities[0][best_match_idx] > 0.75:
-            return FAQs[faq_questions[best_match_idx]]
+        answer, score = embedding_index(audience, model).search(query)
+        if answer is not None and score > 0.75:
+            return answer
 
         return None
     except Exception as e:
-        logging.error(f"❌ Error during semantic search: {str(e)}")
+        logging.error("❌ Error during semantic search: %s", e)
         return None
 
 # Function to scrape a list of URLs for relevant information
 def scrape_urls(query, urls, timeout=5):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"
-    }
+    # Pages are fetched concurrently through the shared pooled session and
+    # parsed at most once per TTL; only the keyword filter runs per query
+    keywords = query.lower().split()
     relevant_sections = []
-
-    for url in urls:
-        try:
-            response = requests.get(url, headers=headers, timeout=timeout)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'p']):
-                    text = tag.get_text(separator="\n").strip()
-                    if any(keyword in text.lower() for keyword in query.split()):
-                        relevant_sections.append(text)
-            else:
-                logging.warning(f"⚠️ Failed to retrieve {url} (Status Code: {response.status_code})")
-
-        except requests.exceptions.Timeout:
-            logging.error(f"⏳ Request to {url} timed out")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"❌ Error fetching {url}: {str(e)}")
+    for sections in fetcher.extract_many(urls, extract_sections, deadline=timeout).values():
+        relevant_sections.extend(text for text in sections if any(keyword in text.lower() for keyword in keywords))
 
     return relevant_sections
 
+# Looks the query up on the college website: the local site index first, then
+# (optionally) a live scrape. Returns (answer, stage) or (None, None)
+@timed("infobot", "website")
+def website_answer(translated_query):
+    site_answer = site_search.best_match(translated_query, encoder=model)
+    if site_answer:
+        return site_answer, "site"
+
+    # Live scraping is an optional fallback, and the default until a site index exists
+    if LIVE_SCRAPE or not site_search.ready:
+        urls = [SITE_URL]
+        scraped_info = scrape_urls(translated_query, urls)
+        if scraped_info:
+            matched_info = max(scraped_info, key=lambda x: fuzz.partial_ratio(translated_query.lower(), x.lower()), default=None)
+            if matched_info:
+                return matched_info, "scrape"
+    return None, None
+
+# Runs the translate → fuzzy → semantic → scrape pipeline for one audience and
+# returns the answer, the stage that produced it, and whether every translation
+# succeeded (a failed one leaves the answer unfit for the response cache)
+def run_pipeline(query, detected_language, audience):
+    # 🌍 Translate query to English for processing
+    translated_query, query_ok = translate_text(query, detected_language, "en")
+    logging.debug("🔎 Translated Query: %s", translated_query)
+
+    # 1️⃣ Check FAQs for an answer
+    answer, source = match_faq(translated_query, audience), "faq"
+
+    # 2️⃣ If not found, perform semantic search
+    if not answer:
+        answer, source = semantic_search(translated_query, audience), "semantic"
+
+    # 3️⃣ If still not found, look the query up on the college website
+    if not answer:
+        answer, source = website_answer(translated_query)
+
+    # 4️⃣ If no answer is found, return a fallback response
+    if not answer:
+        answer, source = FALLBACK_RESPONSE, "fallback"
+
+    response, answer_ok = translate_text(answer, "en", detected_language)
+    return response, source, query_ok and answer_ok
+
+def cache_response(cache_key, response, source, translated):
+    # An untranslated answer is stored under the user's language key; keep it out of
+    # the cache so the next request retries the translation
+    if translated:
+        response_cache.set(cache_key, response, source)
+
+# Answers a query, serving repeated questions from the response cache
+def answer_query(query, audience):
+    # 🔍 Detect query language
+    detected_language = detect_language(query)
+    logging.debug("🔎 Detected Language: %s", detected_language)
+
+    cache_key = response_cache.key(query, detected_language, audience)
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        count_answer("infobot", "cache")
+        return cached_response
+
+    response, source, translated = run_pipeline(query, detected_language, audience)
+    count_answer("infobot", source)
+    cache_response(cache_key, response, source, translated)
+    return response
+
 # Function to handle user queries
 @infobot_bp.route("/query", methods=["POST"])
 def query_handler():
@@ -133,40 +208,86 @@ def query_handler():
         if not query:
             return jsonify({"error": "⚠️ Query parameter is missing"}), 400
 
-        # 🔍 Detect query language
-        detected_language = detect_language(query)
-        logging.info(f"🔎 Detected Language: {detected_language}")
+        audience = resolve_audience(data)
+        start = time.perf_counter()
+        response = answer_query(query, audience)
+        latency.observe(f"infobot.query.{audience}", time.perf_counter() - start)
+        return jsonify({"response": response}), 200
 
-        # 🌍 Translate query to English for processing
-        translated_query = translate_text(query, detected_language, "en")
-        logging.info(f"🔎 Translated Query: {translated_query}")
+    except Exception as e:
+        logging.error("❌ Error processing query: %s", e, exc_info=True)
+        return jsonify({"error": str(e)}), 500
 
-        # 1️⃣ Check FAQs for an answer
-        faq_answer = match_faq(translated_query)
-        if faq_answer:
-            translated_answer = translate_text(faq_answer, "en", detected_language)
-            return jsonify({"response": translated_answer}), 200
+# Same pipeline as run_pipeline without blocking on each step in turn: network-bound
+# steps run on IO_EXECUTOR, model inference on the bounded CPU_EXECUTOR, and the
+# website lookup starts speculatively while semantic search is still running
+async def run_pipeline_async(query, detected_language, audience):
+    loop = asyncio.get_running_loop()
 
-        # 2️⃣ If not found, perform semantic search
-        semantic_answer = semantic_search(translated_query)
-        if semantic_answer:
-            translated_answer = translate_text(semantic_answer, "en", detected_language)
-            return jsonify({"response": translated_answer}), 200
+    def io(fn, *args):
+        return loop.run_in_executor(IO_EXECUTOR, fn, *args)
 
-        # 3️⃣ If still not found, scrape relevant URLs
-        urls = ["https://klsvdit.edu.in/"]
-        scraped_info = scrape_urls(translated_query, urls)
-        if scraped_info:
-            matched_info = max(scraped_info, key=lambda x: fuzz.partial_ratio(translated_query.lower(), x.lower()), default=None)
-            if matched_info:
-                translated_answer = translate_text(matched_info, "en", detected_language)
-                return jsonify({"response": translated_answer}), 200
+    def cpu(fn, *args):
+        return loop.run_in_executor(CPU_EXECUTOR, fn, *args)
+
+    translated_query, query_ok = await io(translate_text, query, detected_language, "en")
+    logging.debug("🔎 Translated Query: %s", translated_query)
+
+    answer, source = await cpu(match_faq, translated_query, audience), "faq"
+    if not answer:
+        website_task = io(website_answer, translated_query)
+        answer, source = await cpu(semantic_search, translated_query, audience), "semantic"
+        if answer:
+            website_task.cancel()
+        else:
+            answer, source = await website_task
+
+    if not answer:
+        answer, source = FALLBACK_RESPONSE, "fallback"
 
-        # 4️⃣ If no answer is found, return a fallback response
-        fallback_response = "🤔 Sorry, I couldn't find the information you requested."
-        translated_fallback = translate_text(fallback_response, "en", detected_language)
-        return jsonify({"response": translated_fallback}), 200
+    response, answer_ok = await io(translate_text, answer, "en", detected_language)
+    return response, source, query_ok and answer_ok
+
+async def answer_query_async(query, audience):
+    loop = asyncio.get_running_loop()
+    detected_language = await loop.run_in_executor(IO_EXECUTOR, detect_language, query)
+
+    cache_key = response_cache.key(query, detected_language, audience)
+    cached_response = response_cache.get(cache_key)
+    if cached_response is not None:
+        count_answer("infobot", "cache")
+        return cached_response
+
+    response, source, translated = await run_pipeline_async(query, detected_language, audience)
+    count_answer("infobot", source)
+    cache_response(cache_key, response, source, translated)
+    return response
+
+# Non-blocking variant of /query (requires Flask's async extra: pip install "flask[async]")
+@infobot_bp.route("/query/async", methods=["POST"])
+async def async_query_handler():
+    try:
+        data = request.get_json()
+        query = data.get("query", "").strip()
+
+        if not query:
+            return jsonify({"error": "⚠️ Query parameter is missing"}), 400
+
+        audience = resolve_audience(data)
+        start = time.perf_counter()
+        response = await answer_query_async(query, audience)
+        latency.observe(f"infobot.query_async.{audience}", time.perf_counter() - start)
+        return jsonify({"response": response}), 200
 
     except Exception as e:
-        logging.error(f"❌ Error processing query: {str(e)}", exc_info=True)
+        logging.error("❌ Error processing query: %s", e, exc_info=True)
         return jsonify({"error": str(e)}), 500
+
+# Per-audience latency summary for the query endpoint
+@infobot_bp.route("/metrics", methods=["GET"])
+def metrics_handler():
+    return jsonify({
+        "latency": latency.summary(),
+        "translation_cache": translation_service.stats(),
+        "response_cache": response_cache.stats(),
+    }), 200
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import logging
+import shutil
+import argparse
+import threading
+from contextlib import contextmanager
+from collections import deque
+from urllib.parse import urljoin, urldefrag, urlparse
+import numpy as np
+import requests
+from app.bm25 import BM25Index, tokenize
+from app.fetch import fetcher, make_soup, extract_sections
+from app.settings import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, and no forking web server either
+    fcntl = None
+
+SITE_URL = os.getenv("INFOBOT_SITE_URL", "https://klsvdit.edu.in/")
+SITE_INDEX_DIR = os.getenv("INFOBOT_SITE_INDEX_DIR", os.path.join(CACHE_DIR, "site_index"))
+
+# Seconds between background re-crawls in the web server (0 disables them; use the CLI from cron
+# instead). Every worker checks, but only the one holding the refresh lock crawls
+SITE_REFRESH_INTERVAL = int(os.getenv("INFOBOT_SITE_REFRESH_SECONDS", "0"))
+
+# Saved index versions kept on disk; older ones are deleted after each save
+SITE_INDEX_KEEP_VERSIONS = 2
+
+# Minimum blended BM25/cosine score for a website answer, as for semantic search
+SITE_MATCH_THRESHOLD = float(os.getenv("INFOBOT_SITE_MATCH_THRESHOLD", "0.75"))
+
+# Without embeddings: share of the query's IDF weight the section must contain
+SITE_MIN_TERM_COVERAGE = float(os.getenv("INFOBOT_SITE_MIN_TERM_COVERAGE", "0.5"))
+
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".doc", ".docx",
+                      ".xls", ".xlsx", ".ppt", ".pptx", ".mp4", ".mp3", ".css", ".js")
+
+
+def crawl(start_url=SITE_URL, max_depth=2, max_pages=200, allowed_domains=None, timeout=10):
+    """Breadth-first crawl from ``start_url`` returning [{"url", "text"}] page sections.
+
+    Only http(s) links on ``allowed_domains`` (default: the start URL's host) are
+    followed, up to ``max_depth`` links away and ``max_pages`` pages in total.
+    Sections repeated on many pages (menus, footers) are kept once. Pages bypass
+    the shared fetch cache, which is sized for the pages queries scrape.
+    """
+    allowed_domains = set(allowed_domains or [urlparse(start_url).netloc])
+    queue = deque([(start_url, 0)])
+    seen = {start_url}
+    seen_texts = set()
+    sections = []
+    pages = 0
+
+    while queue and pages < max_pages:
+        url, depth = queue.popleft()
+        try:
+            status_code, page = fetcher.fetch(url, timeout=timeout, cache=False)
+        except requests.exceptions.RequestException as e:
+            logging.warning("⚠️ Crawl failed for %s: %s", url, e)
+            continue
+        if page is None:
+            logging.warning("⚠️ Crawl skipped %s (Status Code: %s)", url, status_code)
+            continue
+
+        pages += 1
+        soup = make_soup(page.content)
+        for text in extract_sections(soup):
+            if text not in seen_texts:
+                seen_texts.add(text)
+                sections.append({"url": url, "text": text})
+
+        if depth >= max_depth:
+            continue
+        for anchor in soup.find_all("a", href=True):
+            link = urldefrag(urljoin(url, anchor["href"]))[0]
+            parsed = urlparse(link)
+            if (parsed.scheme in ("http", "https") and parsed.netloc in allowed_domains
+                    and not parsed.path.lower().endswith(SKIPPED_EXTENSIONS) and link not in seen):
+                seen.add(link)
+                queue.append((link, depth + 1))
+
+    logging.info("🕸️ Crawled %s pages from %s, %s sections", pages, start_url, len(sections))
+    return sections
+
+
+def current_version(index_dir=SITE_INDEX_DIR):
+    """Name of the index version the ``CURRENT`` pointer file names, or None."""
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_versions(index_dir, keep):
+    versions_dir = os.path.join(index_dir, "versions")
+    names = sorted((name for name in os.listdir(versions_dir) if not name.endswith(".tmp")),
+                   key=lambda name: int(name.split("-")[0]), reverse=True)
+    for name in names[keep:]:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+class SiteIndex:
+    """Searchable local copy of the college website: BM25 over sections plus optional embeddings.
+
+    Each save goes to its own ``versions/<name>`` directory, and the ``CURRENT``
+    pointer file is then replaced atomically, so readers always see sections and
+    embeddings from the same crawl.
+    """
+
+    def __init__(self, sections, bm25=None, embeddings=None):
+        self.sections = sections
+        self.bm25 = bm25 or BM25Index(tokenize(section["text"]) for section in sections)
+        self.embeddings = embeddings
+
+    @classmethod
+    def build(cls, sections, encoder=None):
+        embeddings = None
+        if encoder is not None and sections:
+            embeddings = np.asarray(
+                encoder.encode([section["text"] for section in sections], convert_to_numpy=True, normalize_embeddings=True),
+                dtype=np.float32,
+            )
+        return cls(sections, embeddings=embeddings)
+
+    def save(self, index_dir=SITE_INDEX_DIR):
+        """Write a new index version and point ``CURRENT`` at it; returns the version name."""
+        version = f"{time.time_ns()}-{os.getpid()}"
+        version_dir = os.path.join(index_dir, "versions", version)
+        tmp_dir = f"{version_dir}.tmp"
+        os.makedirs(tmp_dir)
+        if self.embeddings is not None:
+            with open(os.path.join(tmp_dir, "embeddings.npy"), "wb") as f:
+                np.save(f, self.embeddings)
+        with open(os.path.join(tmp_dir, "sections.json"), "w", encoding="utf-8") as f:
+            json.dump({"sections": self.sections, "bm25": self.bm25.to_dict(),
+                       "has_embeddings": self.embeddings is not None}, f)
+        os.rename(tmp_dir, version_dir)
+
+        tmp_path = os.path.join(index_dir, f"CURRENT.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(index_dir, "CURRENT"))
+        # Processes still using an older version keep their open files until they reload
+        _prune_versions(index_dir, SITE_INDEX_KEEP_VERSIONS)
+        return version
+
+    @classmethod
+    def load(cls, index_dir=SITE_INDEX_DIR, version=None):
+        """Load ``version`` (default: the current one) of the index saved in ``index_dir``."""
+        version = version or current_version(index_dir)
+        if version is None:
+            raise FileNotFoundError(os.path.join(index_dir, "CURRENT"))
+        directory = os.path.join(index_dir, "versions", version)
+        with open(os.path.join(directory, "sections.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        embeddings = None
+        embeddings_path = os.path.join(directory, "embeddings.npy")
+        if data.get("has_embeddings") and os.path.exists(embeddings_path):
+            embeddings = np.load(embeddings_path, mmap_mode="r")
+            if embeddings.shape[0] != len(data["sections"]):
+                embeddings = None
+        return cls(data["sections"], BM25Index.from_dict(data["bm25"]), embeddings)
+
+    def coverage(self, query, section):
+        """Share of the query's IDF weight found in ``section`` (0 to 1)."""
+        terms = set(tokenize(query))
+        total = sum(self.bm25.idf(term) for term in terms)
+        if not total:
+            return 0.0
+        found = terms & set(tokenize(section["text"]))
+        return sum(self.bm25.idf(term) for term in found) / total
+
+    def search(self, query, k=1, encoder=None, candidates=20):
+        """Return up to ``k`` (section, score) pairs for a query.
+
+        BM25 selects ``candidates`` sections; when embeddings and an encoder are
+        available they are re-scored by an even blend of normalized BM25 and cosine.
+        """
+        hits = self.bm25.search(tokenize(query), k=candidates)
+        if not hits:
+            return []
+        if self.embeddings is None or encoder is None:
+            return [(self.sections[doc_id], score) for doc_id, score in hits[:k]]
+
+        query_vector = np.asarray(encoder.encode([query], convert_to_numpy=True, normalize_embeddings=True)[0],
+                                  dtype=np.float32)
+        top_bm25 = hits[0][1]
+        blended = [(doc_id, 0.5 * score / top_bm25 + 0.5 * float(self.embeddings[doc_id] @ query_vector))
+                   for doc_id, score in hits]
+        blended.sort(key=lambda item: item[1], reverse=True)
+        return [(self.sections[doc_id], score) for doc_id, score in blended[:k]]
+
+
+class SiteSearch:
+    """Process-wide handle on the on-disk site index, reloaded when a new crawl is saved."""
+
+    def __init__(self, index_dir=SITE_INDEX_DIR, check_interval=30):
+        self.index_dir = index_dir
+        self.check_interval = check_interval
+        self.index = None
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        self._maybe_reload()
+        return self.index is not None
+
+    def reload(self):
+        version = current_version(self.index_dir)
+        if version is None or version == self._version:
+            return
+        try:
+            self.index = SiteIndex.load(self.index_dir, version)
+            self._version = version
+            logging.info("🕸️ Loaded site index %s with %s sections", version, len(self.index.sections))
+        except (OSError, ValueError, KeyError) as e:
+            logging.error("❌ Could not load site index from %s: %s", self.index_dir, e)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            self.reload()
+        finally:
+            self._lock.release()
+
+    def best_match(self, query, encoder=None, threshold=SITE_MATCH_THRESHOLD, min_coverage=SITE_MIN_TERM_COVERAGE):
+        """Text of the best matching website section, or None if nothing matches well enough.
+
+        A blended hit must score above ``threshold``; a BM25-only hit (no embeddings
+        or encoder) has an unbounded score, so it must instead contain at least
+        ``min_coverage`` of the query's IDF weight.
+        """
+        self._maybe_reload()
+        index = self.index
+        if index is None:
+            return None
+        hits = index.search(query, k=1, encoder=encoder)
+        if not hits:
+            return None
+        section, score = hits[0]
+        if index.embeddings is not None and encoder is not None:
+            matched = score > threshold
+        else:
+            matched = index.coverage(query, section) >= min_coverage
+        if not matched:
+            logging.debug("Site index best hit too weak for %r (score %.3f)", query, score)
+            return None
+        return section["text"]
+
+    def refresh(self, start_url=SITE_URL, encoder=None, **crawl_options):
+        """Crawl the site, persist a fresh index and swap it in."""
+        sections = crawl(start_url, **crawl_options)
+        if not sections:
+            logging.warning("⚠️ Crawl returned no sections; keeping the existing site index")
+            return self.index
+        index = SiteIndex.build(sections, encoder=encoder)
+        self._version = index.save(self.index_dir)
+        self.index = index
+        return index
+
+    def age(self):
+        """Seconds since the current index was saved (infinite if there is none)."""
+        try:
+            return time.time() - os.stat(os.path.join(self.index_dir, "CURRENT")).st_mtime
+        except FileNotFoundError:
+            return float("inf")
+
+    @contextmanager
+    def _refresh_lock(self):
+        """Yield True if this process holds the directory's refresh lock, False if another does."""
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, "refresh.lock"), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh_if_stale(self, max_age, encoder=None):
+        """Re-crawl if the saved index is older than ``max_age`` seconds and no other
+        process is already crawling; returns True if this process crawled."""
+        with self._refresh_lock() as acquired:
+            # Checked under the lock: another worker may have just finished a crawl
+            if not acquired or self.age() < max_age:
+                return False
+            self.refresh(encoder=encoder)
+            return True
+
+    def start_refresh(self, interval=SITE_REFRESH_INTERVAL, encoder=None):
+        """Check every ``interval`` seconds in a daemon thread whether the index needs a re-crawl.
+
+        Every web worker may run this; the refresh lock and the index age make sure
+        only one of them crawls per interval, and the others pick up the new version.
+        """
+        def loop():
+            while True:
+                try:
+                    self.refresh_if_stale(interval, encoder=encoder)
+                except Exception as e:
+                    logging.error("❌ Site index refresh failed: %s", e, exc_info=True)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="site-index-refresh", daemon=True)
+        thread.start()
+        return thread
+
+
+site_search = SiteSearch()
+
+
+if __name__ == "__main__":
+    # python -m app.infobot.site_index --url https://klsvdit.edu.in/ --depth 2
+    parser = argparse.ArgumentParser(description="Crawl the college website into a local search index.")
+    parser.add_argument("--url", default=SITE_URL)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=200)
+    parser.add_argument("--domain", action="append", help="extra domain to follow (repeatable)")
+    parser.add_argument("--no-embeddings", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    encoder = None
+    if not args.no_embeddings:
+        from app.embedding_service import get_embedding_service
+        encoder = get_embedding_service()
+    domains = [urlparse(args.url).netloc] + (args.domain or [])
+    index = site_search.refresh(args.url, encoder=encoder, max_depth=args.depth,
+                                max_pages=args.max_pages, allowed_domains=domains)
+    print(f"Indexed {len(index.sections) if index else 0} sections into {SITE_INDEX_DIR}")
@@ -0,0 +1,140 @@
+import os
+import logging
+import threading
+from deep_translator import GoogleTranslator
+from langdetect import detect, DetectorFactory
+from app.cache import LRUCache, SQLiteCache
+from app.knowledge_store import knowledge_store, faq_dataset
+from app.settings import CACHE_DIR
+
+# Ensure consistent language detection
+DetectorFactory.seed = 0
+
+# Languages whose FAQ answers are pre-translated at startup
+SUPPORTED_LANGUAGES = [lang.strip() for lang in os.getenv("INFOBOT_LANGUAGES", "hi,kn,mr").split(",") if lang.strip()]
+
+# Only short queries are worth caching language detection for
+DETECT_CACHE_MAX_CHARS = 120
+
+
+class TranslationService:
+    """Language detection and translation behind a two-level cache.
+
+    Translations are looked up in an in-memory LRU keyed on (text, src, dst), then
+    in a SQLite cache shared by all workers, and only then sent to Google. One
+    GoogleTranslator is kept per language pair instead of one per call.
+    """
+
+    def __init__(self, cache_path=os.path.join(CACHE_DIR, "translations.sqlite3"), memory_size=4096):
+        self.memory = LRUCache(maxsize=memory_size)
+        self.persistent = SQLiteCache(cache_path, table="translations")
+        self.detections = LRUCache(maxsize=memory_size)
+        self.remote_calls = 0
+        self._translators = {}
+        self._lock = threading.Lock()
+
+    def _translator(self, source_lang, target_lang):
+        with self._lock:
+            translator = self._translators.get((source_lang, target_lang))
+            if translator is None:
+                translator = self._translators[(source_lang, target_lang)] = GoogleTranslator(
+                    source=source_lang, target=target_lang
+                )
+            return translator
+
+    @staticmethod
+    def _key(text, source_lang, target_lang):
+        return f"{source_lang}\x1f{target_lang}\x1f{text}"
+
+    def detect(self, text):
+        """Detect the language of ``text``; raises like ``langdetect.detect`` on failure."""
+        if len(text) > DETECT_CACHE_MAX_CHARS:
+            return detect(text)
+        key = text.strip().lower()
+        language = self.detections.get(key)
+        if language is None:
+            language = detect(text)
+            self.detections.set(key, language)
+        return language
+
+    def _cached(self, key):
+        translated = self.memory.get(key)
+        if translated is None:
+            translated = self.persistent.get(key)
+            if translated is not None:
+                self.memory.set(key, translated)
+        return translated
+
+    def translate(self, text, source_lang, target_lang):
+        """Translate ``text``; raises on remote failure so callers decide the fallback."""
+        if source_lang == target_lang or not text:
+            return text
+        key = self._key(text, source_lang, target_lang)
+        translated = self._cached(key)
+        if translated is None:
+            self.remote_calls += 1
+            translated = self._translator(source_lang, target_lang).translate(text)
+            if translated:
+                self.memory.set(key, translated)
+                self.persistent.set(key, translated)
+        return translated
+
+    def translate_batch(self, texts, source_lang, target_lang, batch_size=25):
+        """Translate many texts, sending only cache misses upstream in batches."""
+        if source_lang == target_lang:
+            return list(texts)
+        results = {text: self._cached(self._key(text, source_lang, target_lang)) for text in texts}
+        missing = [text for text, translated in results.items() if translated is None and text]
+
+        translator = self._translator(source_lang, target_lang)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            self.remote_calls += 1
+            translated_batch = translator.translate_batch(batch)
+            fresh = []
+            for text, translated in zip(batch, translated_batch):
+                if translated:
+                    key = self._key(text, source_lang, target_lang)
+                    results[text] = translated
+                    self.memory.set(key, translated)
+                    fresh.append((key, translated))
+            self.persistent.set_many(fresh)
+        return [results.get(text) or text for text in texts]
+
+    def stats(self):
+        return {
+            "memory": self.memory.stats(),
+            "persistent": self.persistent.stats(),
+            "detection": self.detections.stats(),
+            "remote_calls": self.remote_calls,
+        }
+
+
+translation_service = TranslationService()
+
+
+def pretranslate_faq_answers(audiences=("staff", "visitor"), languages=None):
+    """Warm the translation cache with every FAQ answer in every supported language."""
+    languages = languages if languages is not None else SUPPORTED_LANGUAGES
+    for audience in audiences:
+        answers = sorted(set(knowledge_store.get(faq_dataset(audience)).values()))
+        for language in languages:
+            try:
+                translation_service.translate_batch(answers, "en", language)
+                logging.info("🌍 Pre-translated %s %s FAQ answers to '%s'", len(answers), audience, language)
+            except Exception as e:
+                logging.warning("⚠️ Pre-translation to '%s' failed: %s", language, e)
+
+
+def start_pretranslation(audiences=("staff", "visitor")):
+    """Run ``pretranslate_faq_answers`` in a daemon thread so startup is not blocked."""
+    thread = threading.Thread(target=pretranslate_faq_answers, args=(audiences,), name="faq-pretranslate", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    # Offline job: python -m app.infobot.translation
+    logging.basicConfig(level=logging.INFO)
+    pretranslate_faq_answers()
+    print(translation_service.stats())
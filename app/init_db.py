@@ -1,21 +1,15 @@
-import sqlite3
-import os
+from app import create_app
+from app.models import db
+
+# The Student and Staff tables in the app's users database (USER_DATABASE_URI) are
+# the only user schema; the old stand-alone "users" table in new_users.db is unused
 
-DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'new_users.db')
 
 def init_db():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            usn TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    print("Users table has been created successfully.")
-    conn.close()
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    print("Student and Staff tables have been created successfully.")
 
 if __name__ == '__main__':
     init_db()
\ No newline at end of file
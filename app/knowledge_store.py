@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from app.settings import DATA_DIR
+
+# An immutable, versioned view of one dataset; digest is the sha256 of the file bytes
+Snapshot = namedtuple("Snapshot", ["name", "data", "digest", "mtime"])
+
+
+class KnowledgeStore:
+    """In-process store for the JSON datasets under ``DATA_DIR``.
+
+    Each dataset is read and parsed once, then served from memory. A file's mtime is
+    checked at most every ``check_interval`` seconds; when it changes, one caller
+    reloads it while every other reader keeps getting the previous snapshot, so no
+    reader ever waits on disk I/O or JSON parsing after the first load.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, check_interval=2.0):
+        self.data_dir = data_dir
+        self.check_interval = check_interval
+        self._files = {}
+        self._defaults = {}
+        self._snapshots = {}
+        self._checked_at = {}
+        self._derived = {}
+        self._load_locks = {}
+        self._derive_locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, filename, default):
+        """Register a dataset stored in ``filename``; ``default`` is served if it is missing or invalid."""
+        self._files[name] = os.path.join(self.data_dir, filename)
+        self._defaults[name] = default
+        self._load_locks[name] = threading.Lock()
+
+    def _read(self, name):
+        path = self._files[name]
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with open(path, "rb") as f:
+                raw = f.read()
+            data = json.loads(raw.decode("utf-8"))
+            digest = hashlib.sha256(raw).hexdigest()
+        except FileNotFoundError:
+            logging.warning("⚠️ Data file not found: %s", path)
+            return Snapshot(name, self._defaults[name], "", None)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logging.error("❌ Error parsing %s - check its format.", os.path.basename(path))
+            previous = self._snapshots.get(name)
+            return previous or Snapshot(name, self._defaults[name], "", None)
+        logging.info("📚 Loaded dataset '%s' from %s", name, path)
+        return Snapshot(name, data, digest, mtime)
+
+    def _current_mtime(self, name):
+        try:
+            return os.stat(self._files[name]).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def snapshot(self, name):
+        """Return the latest Snapshot of a dataset, reloading it if the file changed."""
+        current = self._snapshots.get(name)
+        load_lock = self._load_locks[name]
+
+        if current is None:
+            # First access: everyone waits for the initial load
+            with load_lock:
+                current = self._snapshots.get(name)
+                if current is None:
+                    current = self._snapshots[name] = self._read(name)
+                    self._checked_at[name] = time.monotonic()
+            return current
+
+        now = time.monotonic()
+        if now - self._checked_at.get(name, 0) < self.check_interval:
+            return current
+        if not load_lock.acquire(blocking=False):
+            return current  # another thread is reloading, keep serving the old snapshot
+        try:
+            self._checked_at[name] = now
+            if self._current_mtime(name) != current.mtime:
+                current = self._snapshots[name] = self._read(name)
+        finally:
+            load_lock.release()
+        return current
+
+    def get(self, name):
+        return self.snapshot(name).data
+
+    def faqs(self, audience):
+        """FAQ question -> answer mapping for an audience ("staff" or "visitor")."""
+        return self.get(faq_dataset(audience))
+
+    def library(self):
+        return self.get("library_books")
+
+    def derived(self, name, key, builder):
+        """Return ``builder(snapshot)`` cached per dataset version.
+
+        Used for indexes built from a dataset. While a rebuild for a new version is
+        running, other callers keep receiving the value built for the previous one.
+        """
+        snapshot = self.snapshot(name)
+        cache_key = (name, key)
+        cached = self._derived.get(cache_key)
+        if cached is not None and cached[0] == snapshot.digest:
+            return cached[1]
+
+        with self._lock:
+            derive_lock = self._derive_locks.setdefault(cache_key, threading.Lock())
+        if not derive_lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            cached = self._derived.get(cache_key)
+            if cached is None or cached[0] != snapshot.digest:
+                cached = self._derived[cache_key] = (snapshot.digest, builder(snapshot))
+        finally:
+            derive_lock.release()
+        return cached[1]
+
+    def derived_values(self):
+        """[((name, key), value)] for every derived index built so far."""
+        return [(cache_key, cached[1]) for cache_key, cached in list(self._derived.items())]
+
+
+def faq_dataset(audience):
+    return "staff_faqs" if audience == "staff" else "visitor_faqs"
+
+
+knowledge_store = KnowledgeStore()
+knowledge_store.register("staff_faqs", "staff_faqs.json", {})
+knowledge_store.register("visitor_faqs", "visitor_faqs.json", {})
+knowledge_store.register("library_books", "library_books.json", [])
@@ -1,8 +1,7 @@
-import json
+from app.knowledge_store import knowledge_store
 
 def load_library():
-    with open("data/library_books.json", "r") as f:
-        return json.load(f)
+    return knowledge_store.library()
 
 def search_books(keyword):
     library = load_library()
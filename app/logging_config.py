@@ -0,0 +1,209 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+# "production" logs INFO and up with quiet third-party libraries; "debug" logs
+# everything, sampling DEBUG records from hot call sites
+LOG_PROFILE = os.getenv("LOG_PROFILE", "production")
+
+# Overrides the profile's level when set (e.g. LOG_LEVEL=WARNING)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "")
+
+# Also write to this file; WatchedFileHandler reopens it after logrotate
+LOG_FILE = os.getenv("LOG_FILE", "")
+
+# In the debug profile, keep 1 in N DEBUG records per call site (1 keeps them all)
+LOG_DEBUG_SAMPLE = int(os.getenv("LOG_DEBUG_SAMPLE", "10"))
+
+# Records waiting for the writer thread; beyond this they are dropped, not waited on
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+PROFILES = {
+    "production": {
+        "level": logging.INFO,
+        "library_level": logging.WARNING,
+        "debug_sample": 1,
+        "langchain_verbose": False,
+        "format": "%(asctime)s %(levelname)s %(name)s: %(message)s",
+    },
+    "debug": {
+        "level": logging.DEBUG,
+        "library_level": logging.INFO,
+        "debug_sample": LOG_DEBUG_SAMPLE,
+        "langchain_verbose": os.getenv("LANGCHAIN_VERBOSE", "0") == "1",
+        "format": "%(asctime)s - %(name)s - %(levelname)s - %(threadName)s - %(message)s",
+    },
+}
+
+# Third-party loggers held at the profile's library level
+NOISY_LIBRARIES = ("urllib3", "httpx", "httpcore", "filelock", "PIL", "sentence_transformers",
+                   "transformers", "faiss", "groq", "gtts", "langchain", "werkzeug")
+
+
+class DebugSampler(logging.Filter):
+    """Pass one in ``every`` DEBUG records per call site; other levels always pass."""
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = max(1, every)
+        self.dropped = 0
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        # Unsynchronised on purpose: a lost increment only shifts which record is kept
+        site = (record.pathname, record.lineno)
+        seen = self._seen.get(site, 0)
+        self._seen[site] = seen + 1
+        if seen % self.every:
+            self.dropped += 1
+            return False
+        return True
+
+
+# Log arguments that cannot change after the call returns, so formatting them can wait
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None), BaseException)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting and I/O to the listener thread.
+
+    The stock handler formats every record on the calling thread so it can be
+    pickled. These records never leave the process, so a record whose arguments are
+    all immutable is queued as is and %-formatted by the writer thread, along with
+    its timestamp and traceback. Only a record with a mutable argument (a list, a
+    dict, an object) is merged up front, because the caller may change it after the
+    call returns. A full queue drops the record instead of blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        args = record.args
+        if args and not (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARGS) for arg in args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def stop(self):
+        """Drain and stop the writer thread without raising queue.Full (e.g. at interpreter exit)."""
+        if self._thread is None:
+            return
+        try:
+            # The writer is still draining, so waiting briefly for a free slot is enough
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            self._thread = None  # writer is stuck; abandon it rather than hang the exit
+            return
+        self._thread.join()
+        self._thread = None
+
+
+_handler = None
+_listener = None
+_outputs = ()
+_lock = threading.Lock()
+
+
+def _start_listener():
+    global _listener
+    _listener = _Listener(_handler.queue, *_outputs, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # drains what is already queued
+        _listener = None
+
+
+def _after_fork():
+    # The writer thread does not survive fork(), and its queue's lock may have been
+    # held at the time; a forked worker starts over with a fresh queue and thread
+    if _handler is not None:
+        _handler.queue = queue.Queue(LOG_QUEUE_SIZE)
+        _start_listener()
+
+
+def set_langchain_verbose(verbose):
+    """Toggle LangChain's global verbose flag, importing LangChain only to turn it on."""
+    if not verbose and "langchain_core" not in sys.modules and "langchain" not in sys.modules:
+        return
+    try:
+        from langchain_core.globals import set_verbose
+    except ImportError:
+        try:
+            from langchain.globals import set_verbose
+        except ImportError:
+            return
+    set_verbose(verbose)
+
+
+def configure_logging(profile=None, stream=None):
+    """Route all logging through one bounded queue drained by a background thread.
+
+    Replaces any handlers already on the root logger (e.g. from ``basicConfig``) and
+    can be called again to switch profiles. Returns the profile name in effect.
+    """
+    global _handler, _outputs
+    name = profile or LOG_PROFILE
+    if name not in PROFILES:
+        name = "production"
+    settings = PROFILES[name]
+
+    with _lock:
+        _stop_listener()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        formatter = logging.Formatter(settings["format"])
+        outputs = [logging.StreamHandler(stream or sys.stderr)]
+        if LOG_FILE:
+            outputs.append(logging.handlers.WatchedFileHandler(LOG_FILE, encoding="utf-8"))
+        for output in outputs:
+            output.setFormatter(formatter)
+        _outputs = tuple(outputs)
+
+        _handler = DeferredQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(DebugSampler(settings["debug_sample"]))
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL.upper() or settings["level"])
+        for library in NOISY_LIBRARIES:
+            logging.getLogger(library).setLevel(settings["library_level"])
+        _start_listener()
+
+    set_langchain_verbose(settings["langchain_verbose"])
+    return name
+
+
+def stats():
+    if _handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": _handler.queue.qsize(),
+        "dropped_queue_full": _handler.dropped,
+        "dropped_sampled": sum(f.dropped for f in _handler.filters if isinstance(f, DebugSampler)),
+    }
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -1,13 +1,17 @@
 from flask import Flask, request, render_template, flash, redirect, url_for, session
 from flask_wtf.csrf import CSRFProtect
 from datetime import timedelta
-from app.models import db, Student, Staff
+from app.models import db
+from app.users import user_repository, engine_options, tune_sqlite, USER_DATABASE_URI
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = USER_DATABASE_URI
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
 app.secret_key = 'your_secret_key'
 app.permanent_session_lifetime = timedelta(minutes=30)
 db.init_app(app)
+with app.app_context():
+    tune_sqlite(db.engine)
 
 # CSRF Protection
 csrf = CSRFProtect(app)
@@ -18,18 +22,16 @@ def login():
         email = request.form['email']
         password = request.form['password']
 
-        # Check in Student Table
-        student = Student.query.filter_by(email=email, usn=password).first()
-        if student:
-            session['user_id'] = student.id
+        # Student and Staff tables in one lookup
+        identity = user_repository.authenticate(email, password)
+        if identity and identity.user_type == 'student':
+            session['user_id'] = identity.id
             session['user_type'] = 'student'
             flash("Login Successful as Student!", "success")
             return redirect(url_for('dashboard'))
 
-        # Check in Staff Table
-        staff = Staff.query.filter_by(email=email, unique_id=password).first()
-        if staff:
-            session['user_id'] = staff.id
+        if identity:
+            session['user_id'] = identity.id
             session['user_type'] = 'staff'
             flash("Login Successful as Staff!", "success")
             return redirect(url_for('staff_chat'))
@@ -0,0 +1,259 @@
+import os
+import time
+import bisect
+import functools
+import threading
+import contextlib
+from collections import deque
+
+
+class LatencyStats:
+    """Count, total, max and a window of recent samples for one latency series."""
+
+    def __init__(self, window=1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, pct):
+        samples = sorted(self.recent)
+        if not samples:
+            return 0.0
+        return samples[min(int(len(samples) * pct / 100), len(samples) - 1)]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class LatencyRecorder:
+    """Thread-safe collection of named latency series."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self._series.setdefault(name, LatencyStats()).observe(seconds)
+
+    def summary(self):
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self._series.items())}
+
+
+latency = LatencyRecorder()
+
+
+# Set METRICS_ENABLED=0 to turn spans and counters into no-ops
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+METRIC_PREFIX = "infobot_"
+
+# Latency histogram buckets in seconds, from cache hits up to slow LLM answers
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class MetricsRegistry:
+    """Counters, histograms and callback gauges, rendered in the Prometheus text format.
+
+    Series are keyed by metric name plus a sorted tuple of label pairs. Gauges are
+    callbacks evaluated at scrape time, so sizes of models, indexes and caches cost
+    nothing between scrapes.
+    """
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def gauge(self, name, help_text, callback):
+        """Register ``callback()`` returning a number, or {label dict as tuple of pairs: number}."""
+        self._help[name] = help_text
+        self._gauges[name] = callback
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            snapshots = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+
+        def header(name, kind, family=None):
+            # In the Prometheus text format HELP/TYPE name the family exactly as its
+            # samples do, so a counter's header carries the _total suffix as well
+            family = family or name
+            if family not in seen:
+                seen.add(family)
+                if name in self._help:
+                    lines.append(f"# HELP {self.prefix}{family} {self._help[name]}")
+                lines.append(f"# TYPE {self.prefix}{family} {kind}")
+
+        seen = set()
+        for (name, labels), value in counters:
+            header(name, "counter", f"{name}_total")
+            lines.append(f"{self.prefix}{name}_total{_label_text(labels)} {value}")
+
+        for (name, labels), counts, total, count, buckets in snapshots:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.prefix}{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.prefix}{name}_bucket{_label_text(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.prefix}{name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{self.prefix}{name}_count{_label_text(labels)} {count}")
+
+        for name, callback in sorted(self._gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue  # a gauge must never break the scrape
+            header(name, "gauge")
+            series = value.items() if isinstance(value, dict) else [((), value)]
+            for labels, number in series:
+                if number is not None:
+                    lines.append(f"{self.prefix}{name}{_label_text(labels)} {number}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.describe("stage_duration_seconds", "Time spent in one stage of a query or ingestion pipeline.")
+registry.describe("request_duration_seconds", "HTTP request latency by endpoint.")
+registry.describe("answers", "Answers served, by pipeline and the stage that produced them.")
+
+
+class _Span:
+    __slots__ = ("pipeline", "stage", "start")
+
+    def __init__(self, pipeline, stage):
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        registry.observe("stage_duration_seconds", elapsed, pipeline=self.pipeline, stage=self.stage)
+        latency.observe(f"{self.pipeline}.{self.stage}", elapsed)
+        return False
+
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(pipeline, stage):
+    """Time a block as one pipeline stage: ``with span("docbot", "retrieve"): ...``."""
+    return _Span(pipeline, stage) if METRICS_ENABLED else _NO_SPAN
+
+
+def timed(pipeline, stage):
+    """Decorator form of ``span``; returns the function untouched when metrics are disabled."""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(pipeline, stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_answer(pipeline, source):
+    if METRICS_ENABLED:
+        registry.inc("answers", pipeline=pipeline, source=source)
+
+
+def resident_memory_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+registry.gauge("process_resident_memory_bytes", "Resident memory of this worker process.", resident_memory_bytes)
+
+
+def install(app):
+    """Time every request of ``app`` and serve all metrics at /metrics in Prometheus text format."""
+    from flask import g, request, Response
+
+    if METRICS_ENABLED:
+        @app.before_request
+        def start_request_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def observe_request(response):
+            start = g.pop("metrics_start", None)
+            if start is not None:
+                endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+                registry.observe("request_duration_seconds", time.perf_counter() - start,
+                                 endpoint=endpoint, method=request.method, status=response.status_code)
+            return response
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
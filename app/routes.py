@@ -1,6 +1,12 @@
-from flask import render_template, request, jsonify
-from handlers import process_query
-from stt_tts import text_to_speech, speech_to_text
+import os
+import re
+import json
+import logging
+import tempfile
+from flask import render_template, request, jsonify, send_file, abort, url_for, Response, stream_with_context
+from app.stt_tts import speech_to_text, get_audio_cache, get_stt_service, TTS_RECORD_TTL
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
 
 def setup_routes(app):
     @app.route("/stt", methods=["POST"])
@@ -10,9 +16,80 @@ def setup_routes(app):
         text = speech_to_text(audio_file, lang)
         return jsonify({"text": text})
 
+    @app.route("/stt/stream", methods=["POST"])
+    def stt_stream():
+        """Transcribe as Server-Sent Events: a ``partial`` event per audio chunk, then ``done``."""
+        import speech_recognition as sr
+
+        lang = request.form.get("lang", "en")
+        # The upload is closed with the request, so keep our own copy for the stream
+        fd, audio_path = tempfile.mkstemp(prefix="stt-", suffix=os.path.splitext(request.files["audio"].filename or "")[1])
+        os.close(fd)
+        request.files["audio"].save(audio_path)
+
+        def events():
+            parts = []
+            try:
+                for index, text in enumerate(get_stt_service().transcribe_stream(audio_path, lang)):
+                    if text:
+                        parts.append(text)
+                    yield sse_event("partial", {"index": index, "text": text, "transcript": " ".join(parts)})
+                yield sse_event("done", {"text": " ".join(parts) or "Could not understand the audio."})
+            except sr.RequestError:
+                yield sse_event("error", {"error": "Speech recognition service unavailable."})
+
+        response = Response(stream_with_context(events()), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        response.call_on_close(lambda: os.remove(audio_path))
+        return response
+
     @app.route("/tts", methods=["POST"])
     def tts():
         text = request.json.get("text", "")
         lang = request.json.get("lang", "en")
-        audio_path = text_to_speech(text, lang)
-        return jsonify({"audio_path": audio_path})
\ No newline at end of file
+        if not text.strip():
+            return jsonify({"error": "Text is missing"}), 400
+        try:
+            digest = get_audio_cache().get_or_create(text, lang)
+        except Exception as e:
+            logging.error("❌ Speech synthesis failed: %s", e, exc_info=True)
+            return jsonify({"error": "Speech synthesis failed."}), 502
+        # "stream": true returns the audio itself instead of a link to it
+        if request.json.get("stream"):
+            return audio_response(digest)
+        audio_url = url_for("tts_audio", digest=digest)
+        return jsonify({"audio_path": audio_url, "audio_url": audio_url})
+
+    @app.route("/tts/audio/<digest>.mp3", methods=["GET"])
+    def tts_audio(digest):
+        """Cached speech by content hash, synthesized again if the file was evicted since."""
+        if not _DIGEST.match(digest):
+            abort(404)
+        cache = get_audio_cache()
+        if not os.path.exists(cache.path(digest)):
+            try:
+                regenerated = cache.regenerate(digest)
+            except Exception as e:
+                logging.error("❌ Speech synthesis failed: %s", e, exc_info=True)
+                return jsonify({"error": "Speech synthesis failed."}), 502
+            if regenerated is None:
+                abort(404)
+        return audio_response(digest)
+
+    @app.route("/speech/metrics", methods=["GET"])
+    def speech_metrics():
+        return jsonify({"audio_cache": get_audio_cache().stats(), "stt": get_stt_service().stats()})
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def audio_response(digest):
+    # Not "immutable": the URL only lives as long as its record, so clients revalidate
+    # (by ETag) after at most that long
+    try:
+        response = send_file(get_audio_cache().path(digest), mimetype="audio/mpeg", conditional=True,
+                             etag=digest, max_age=TTS_RECORD_TTL)
+    except FileNotFoundError:
+        abort(404)
+    response.headers["Cache-Control"] = f"public, max-age={TTS_RECORD_TTL}"
+    return response
@@ -0,0 +1,9 @@
+import os
+
+# Shared filesystem locations, overridable through the environment
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("INFOBOT_DATA_DIR", os.path.join(APP_DIR, "data"))
+CACHE_DIR = os.getenv("INFOBOT_CACHE_DIR", os.path.join(APP_DIR, "instance", "cache"))
+
+# Sentence-transformers model used for every embedding in the app
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
@@ -1,21 +1,451 @@
-import speech_recognition as sr
-from gtts import gTTS
 import os
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import itertools
+import queue
+from collections import deque
+from concurrent.futures import Future
+from app.metrics import registry
+from app.settings import CACHE_DIR
 
-def speech_to_text(audio_file, lang="en"):
-    recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file) as source:
-        audio = recognizer.record(source)
+logger = logging.getLogger(__name__)
+
+# Synthesized audio, one file per (engine, language, text), evicted least recently used first
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(CACHE_DIR, "tts"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MB", "256")) * 1024 * 1024
+
+# How long the (language, text) behind an audio URL is kept, so an evicted file can be
+# synthesized again when its URL is requested; also the URL's client cache lifetime
+TTS_RECORD_TTL = int(os.getenv("TTS_RECORD_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Which registered engine synthesizes speech: gtts, or fake for tests
+TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")
+
+# Which registered recognizer transcribes speech: google, or the offline sphinx, whisper or fake
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+
+# Recognition calls running at once in this process, across all requests
+STT_WORKERS = int(os.getenv("STT_WORKERS", "4"))
+
+# Audio is read and recognized in segments of this many seconds
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "15"))
+
+STT_WHISPER_MODEL = os.getenv("STT_WHISPER_MODEL", "base")
+
+# Backend name -> function(recognizer, audio_data, lang) returning the recognized text
+STT_BACKENDS = {}
+
+
+def register_stt_backend(name):
+    def decorator(func):
+        STT_BACKENDS[name] = func
+        return func
+    return decorator
+
+
+@register_stt_backend("google")
+def google_backend(recognizer, audio, lang):
+    return recognizer.recognize_google(audio, language=lang)
+
+
+@register_stt_backend("sphinx")
+def sphinx_backend(recognizer, audio, lang):
+    """Offline CMU Sphinx (pocketsphinx); only US English ships with it."""
+    return recognizer.recognize_sphinx(audio, language="en-US" if lang == "en" else lang)
+
+
+@register_stt_backend("whisper")
+def whisper_backend(recognizer, audio, lang):
+    """Offline Whisper model run locally (openai-whisper), multilingual."""
+    return recognizer.recognize_whisper(audio, model=STT_WHISPER_MODEL, language=lang)
+
+
+@register_stt_backend("fake")
+def fake_backend(recognizer, audio, lang):
+    """Offline stand-in for tests: takes 0.2s plus 0.05s per second of audio."""
+    seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+    time.sleep(0.2 + 0.05 * seconds)
+    return f"[{seconds:.1f}s of speech]"
+
+
+class ChunkPool:
+    """Fixed thread pool that runs lower-numbered chunks first.
+
+    Chunk 0 of a newly arrived clip overtakes chunk 5 of a long clip already in
+    progress, so short clips and first partial transcripts are not stuck behind
+    long recordings; ties run in arrival order.
+    """
+
+    def __init__(self, workers):
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        for number in range(workers):
+            threading.Thread(target=self._work, name=f"stt-{number}", daemon=True).start()
+
+    def submit(self, priority, fn, *args):
+        future = Future()
+        self._queue.put((priority, next(self._sequence), fn, args, future))
+        return future
+
+    def _work(self):
+        while True:
+            _, _, fn, args, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class SpeechToTextService:
+    """Chunked speech recognition on a bounded, process-wide thread pool.
+
+    The audio file is read ``chunk_seconds`` at a time (a werkzeug upload is
+    already spooled to disk), each chunk is recognized on a shared ChunkPool, and results
+    come back in order as soon as each one is ready. At most ``max_in_flight``
+    chunks of one clip are buffered, so long clips never sit in memory whole.
+    """
+
+    def __init__(self, backend=STT_BACKEND, workers=STT_WORKERS, chunk_seconds=STT_CHUNK_SECONDS):
+        if backend not in STT_BACKENDS:
+            raise ValueError(f"Unknown STT_BACKEND '{backend}' (choose from {', '.join(STT_BACKENDS)})")
+        self.backend = backend
+        self.workers = workers
+        self.chunk_seconds = chunk_seconds
+        self.max_in_flight = workers * 2
+        self.clips = 0
+        self.chunks = 0
+        self.audio_seconds = 0.0
+        self.recognition_seconds = 0.0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        # Threads do not survive fork(), so a forked worker creates its own pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ChunkPool(self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _recognize(self, audio, lang):
+        import speech_recognition as sr
+
+        start = time.perf_counter()
         try:
-            text = recognizer.recognize_google(audio, language=lang)
-            return text
+            return STT_BACKENDS[self.backend](sr.Recognizer(), audio, lang).strip()
         except sr.UnknownValueError:
-            return "Could not understand the audio."
-        except sr.RequestError:
-            return "Speech recognition service unavailable."
+            return ""
+        finally:
+            self.recognition_seconds += time.perf_counter() - start
+
+    def read_chunks(self, audio_file):
+        """Yield sr.AudioData segments of ``chunk_seconds`` from a WAV, AIFF or FLAC file.
+
+        Frames are read straight from the stream rather than through
+        ``Recognizer.record``, which drops the buffer that crosses ``duration``, so
+        the segments add up to the whole clip.
+        """
+        import speech_recognition as sr
+
+        with sr.AudioFile(audio_file) as source:
+            frames_per_chunk = max(1, int(self.chunk_seconds * source.SAMPLE_RATE))
+            while True:
+                frame_data = source.stream.read(frames_per_chunk)
+                if not frame_data:
+                    return
+                audio = sr.AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                self.audio_seconds += len(frame_data) / (source.SAMPLE_RATE * source.SAMPLE_WIDTH)
+                yield audio
+
+    def transcribe_stream(self, audio_file, lang="en"):
+        """Yield the text of each chunk, in order, as soon as it and every earlier chunk are done."""
+        pool = self._get_pool()
+        self.clips += 1
+        pending = deque()
+        for index, audio in enumerate(self.read_chunks(audio_file)):
+            self.chunks += 1
+            pending.append(pool.submit(index, self._recognize, audio, lang))
+            while len(pending) >= self.max_in_flight or (pending and pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def transcribe(self, audio_file, lang="en"):
+        return " ".join(text for text in self.transcribe_stream(audio_file, lang) if text)
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "clips": self.clips,
+            "chunks": self.chunks,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "recognition_seconds": round(self.recognition_seconds, 3),
+        }
+
+
+_stt_service = None
+_stt_service_lock = threading.Lock()
+
+
+def get_stt_service():
+    global _stt_service
+    with _stt_service_lock:
+        if _stt_service is None:
+            _stt_service = SpeechToTextService()
+        return _stt_service
+
+
+def speech_to_text(audio_file, lang="en"):
+    import speech_recognition as sr
+
+    try:
+        text = get_stt_service().transcribe(audio_file, lang)
+        return text or "Could not understand the audio."
+    except sr.RequestError:
+        return "Speech recognition service unavailable."
+
+# Engine name -> function(text, lang, path) writing MP3 audio to path
+TTS_ENGINES = {}
+
+
+def register_tts_engine(name):
+    def decorator(func):
+        TTS_ENGINES[name] = func
+        return func
+    return decorator
+
+
+@register_tts_engine("gtts")
+def gtts_engine(text, lang, path):
+    from gtts import gTTS
+    gTTS(text=text, lang=lang).save(path)
+
+
+@register_tts_engine("fake")
+def fake_engine(text, lang, path):
+    """Offline stand-in: a deterministic MP3-framed payload derived from the text."""
+    payload = hashlib.sha256(f"{lang}\x1f{text}".encode("utf-8")).digest()
+    with open(path, "wb") as f:
+        f.write(b"ID3\x03\x00\x00\x00\x00\x00\x00" + payload * max(1, len(text) // 8))
+
+
+class AudioCache:
+    """Content-addressed, size-bounded on-disk cache of synthesized speech.
+
+    Files are named by sha256(engine, language, text), so identical answers are
+    synthesized once and concurrent requests never overwrite each other's audio.
+    A hit refreshes the file's mtime; when the directory grows past ``max_bytes``
+    the least recently used files are removed. Several workers share the directory,
+    so its size is measured on disk after every synthesis rather than tracked per
+    process. A small ``<digest>.txt`` record of the
+    language and text outlives the audio (for ``TTS_RECORD_TTL``), so ``regenerate``
+    can bring an evicted file back for a URL that was already handed out.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES, engine=TTS_ENGINE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self.synthesis_seconds = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._size = None
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def digest(self, text, lang):
+        return hashlib.sha256(f"{self.engine}\x1f{lang}\x1f{text}".encode("utf-8")).hexdigest()
+
+    def path(self, digest):
+        return os.path.join(self.directory, f"{digest}.mp3")
+
+    def record_path(self, digest):
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def _write_record(self, digest, text, lang):
+        tmp_path = f"{self.record_path(digest)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"{lang}\n{text}")
+        os.replace(tmp_path, self.record_path(digest))
+
+    def regenerate(self, digest):
+        """Synthesize an evicted file again from its record; None if the digest is unknown."""
+        try:
+            with open(self.record_path(digest), "r", encoding="utf-8") as f:
+                lang, _, text = f.read().partition("\n")
+        except FileNotFoundError:
+            return None
+        if self.digest(text, lang) != digest:
+            return None  # recorded under another engine
+        return self.get_or_create(text, lang)
+
+    def _digest_lock(self, digest):
+        with self._lock:
+            return self._locks.setdefault(digest, threading.Lock())
+
+    def get_or_create(self, text, lang="en"):
+        """Return the digest of the audio for ``text``, synthesizing it on a miss."""
+        digest = self.digest(text, lang)
+        path = self.path(digest)
+        if self._touch(path):
+            self._touch(self.record_path(digest))  # the URL stays valid while it is in use
+            self.hits += 1
+            return digest
+
+        # One synthesis per digest even when several requests miss at once
+        lock = self._digest_lock(digest)
+        try:
+            with lock:
+                if self._touch(path):
+                    self.hits += 1
+                    return digest
+                self.misses += 1
+                start = time.perf_counter()
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                os.close(fd)
+                try:
+                    TTS_ENGINES[self.engine](text, lang, tmp_path)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    os.remove(tmp_path)
+                    raise
+                self._write_record(digest, text, lang)
+                self.synthesis_seconds += time.perf_counter() - start
+        finally:
+            with self._lock:
+                self._locks.pop(digest, None)
+        self._grew()
+        return digest
+
+    @staticmethod
+    def _touch(path):
+        """Mark a cached file as recently used; False if it is not cached."""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _measure(self):
+        size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                try:
+                    size += entry.stat().st_size
+                except FileNotFoundError:
+                    pass  # evicted by another worker meanwhile
+        return size
+
+    def _grew(self):
+        # Other workers write to the same directory, so only the disk knows its size
+        with self._lock:
+            self._size = self._measure()
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Trim to 90% of the budget so eviction does not run on every miss
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".mp3"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        self._purge_records()
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def _purge_records(self):
+        cutoff = time.time() - TTS_RECORD_TTL
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".txt") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "synthesis_seconds": round(self.synthesis_seconds, 3),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
+
+
+registry.gauge("tts_cache_bytes", "Size of the synthesized speech cache on disk.", lambda: getattr(_audio_cache, "_size", None))
+
 
 def text_to_speech(text, lang="en"):
-    tts = gTTS(text=text, lang=lang)
-    audio_path = f"static/audio/output.mp3"
-    tts.save(audio_path)
-    return audio_path
+    """Return the path of an MP3 of ``text``, synthesized once per (text, lang) and then cached."""
+    cache = get_audio_cache()
+    return cache.path(cache.get_or_create(text, lang))
+
+
+def pregenerate_faq_audio(audiences=("staff", "visitor"), languages=None):
+    """Synthesize every FAQ answer in English and each supported language ahead of time."""
+    from app.infobot.translation import SUPPORTED_LANGUAGES, translation_service
+    from app.knowledge_store import knowledge_store, faq_dataset
+
+    languages = ["en"] + list(languages if languages is not None else SUPPORTED_LANGUAGES)
+    cache = get_audio_cache()
+    for audience in audiences:
+        answers = sorted(set(knowledge_store.get(faq_dataset(audience)).values()))
+        for language in languages:
+            texts = answers if language == "en" else translation_service.translate_batch(answers, "en", language)
+            failed = 0
+            for text in texts:
+                try:
+                    cache.get_or_create(text, language)
+                except Exception as e:
+                    failed += 1
+                    logger.warning("⚠️ Speech synthesis in '%s' failed: %s", language, e)
+            logger.info("🔊 Pre-generated %s %s FAQ answers in '%s'", len(texts) - failed, audience, language)
+
+
+if __name__ == "__main__":
+    # Offline job: python -m app.stt_tts --pregenerate
+    parser = argparse.ArgumentParser(description="Speech utilities for Infobot.")
+    parser.add_argument("--pregenerate", action="store_true", help="synthesize all FAQ answers ahead of time")
+    parser.add_argument("--languages", help="comma-separated languages besides English (default: INFOBOT_LANGUAGES)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.pregenerate:
+        pregenerate_faq_audio(languages=args.languages.split(",") if args.languages else None)
+        print(get_audio_cache().stats())
+    else:
+        parser.print_help()
@@ -1,14 +1,15 @@
-from sentence_transformers import SentenceTransformer
+from app.embedding_service import get_embedding_service
 
 # Try loading the model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+model = get_embedding_service()
 
 # Test embedding generation
 query_embedding = model.encode("What are the admission criteria?")
 print(query_embedding)
 import logging
+from app.logging_config import configure_logging
 
-logging.basicConfig(level=logging.DEBUG)
+configure_logging("debug")
 logging.debug("Script is running")
 
 # Rest of your script
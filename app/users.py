@@ -0,0 +1,113 @@
+import os
+import hashlib
+from collections import namedtuple
+from sqlalchemy import event, insert, literal, literal_column, select, union_all
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from app.cache import LRUCache
+from app.models import db, Student, Staff
+
+USER_DATABASE_URI = os.getenv("USER_DATABASE_URI", "sqlite:///users.db")
+
+# Connections each worker keeps open to a client/server users database (not SQLite)
+USER_DB_POOL_SIZE = int(os.getenv("USER_DB_POOL_SIZE", "8"))
+USER_DB_MAX_OVERFLOW = int(os.getenv("USER_DB_MAX_OVERFLOW", "16"))
+
+# Seconds a writer waits for SQLite's write lock before giving up
+USER_DB_BUSY_TIMEOUT = int(os.getenv("USER_DB_BUSY_TIMEOUT", "15"))
+
+# Successful logins remembered per process; failures are never cached
+LOGIN_CACHE_TTL = int(os.getenv("LOGIN_CACHE_TTL_SECONDS", "300"))
+LOGIN_CACHE_SIZE = int(os.getenv("LOGIN_CACHE_SIZE", "4096"))
+
+# A signed-in user: user_type is "student" or "staff", id is the row in that table
+Identity = namedtuple("Identity", ["user_type", "id", "name", "email"])
+
+
+def engine_options(uri=USER_DATABASE_URI):
+    """SQLALCHEMY_ENGINE_OPTIONS for the users database at ``uri``.
+
+    SQLite keeps SQLAlchemy's default pool for the URI (depending on the version and
+    on whether the database is in memory, one that rejects sizing options) and gets
+    a busy timeout instead; client/server databases get a sized QueuePool.
+    """
+    if make_url(uri).get_backend_name() == "sqlite":
+        return {"connect_args": {"timeout": USER_DB_BUSY_TIMEOUT, "check_same_thread": False}}
+    return {"pool_size": USER_DB_POOL_SIZE, "max_overflow": USER_DB_MAX_OVERFLOW,
+            "pool_timeout": USER_DB_BUSY_TIMEOUT, "pool_pre_ping": True}
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; safe with WAL
+    cursor.close()
+
+
+def tune_sqlite(engine):
+    """Put every new connection of ``engine`` in WAL mode, so logins never wait on a registration."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_pragmas)
+
+
+class UserRepository:
+    """Student and staff accounts behind one lookup.
+
+    ``authenticate`` checks both tables in a single statement (each half an index
+    seek on the unique email column) and keeps successful results in a small TTL
+    cache keyed by a hash of the credentials. Registration inserts straight away
+    and treats a unique-constraint violation as "already registered" instead of
+    checking for duplicates first, so two concurrent sign-ups for the same email or
+    ID cannot both succeed.
+    """
+
+    def __init__(self, cache_size=LOGIN_CACHE_SIZE, cache_ttl=LOGIN_CACHE_TTL):
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @staticmethod
+    def _cache_key(email, secret):
+        return hashlib.sha256(f"{email}\x1f{secret}".encode("utf-8")).hexdigest()
+
+    def authenticate(self, email, secret):
+        """Return the Identity whose email and USN (students) or unique ID (staff) match, or None."""
+        key = self._cache_key(email, secret)
+        identity = self.cache.get(key)
+        if identity is not None:
+            return identity
+
+        # Students take precedence when the same email is registered in both tables
+        students = select(literal("student").label("user_type"), Student.id, Student.name, Student.email,
+                          literal(0).label("priority")).where(Student.email == email, Student.usn == secret)
+        staff = select(literal("staff").label("user_type"), Staff.id, Staff.name, Staff.email,
+                       literal(1).label("priority")).where(Staff.email == email, Staff.unique_id == secret)
+        row = db.session.execute(union_all(students, staff).order_by(literal_column("priority")).limit(1)).first()
+        if row is None:
+            return None
+
+        identity = Identity(row.user_type, row.id, row.name, row.email)
+        self.cache.set(key, identity)
+        return identity
+
+    def _insert(self, model, values):
+        try:
+            db.session.execute(insert(model).values(**values))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    def register_student(self, name, email, usn, batch, branch, pass_out_year):
+        """Insert a student; False if the email or USN is already registered."""
+        return self._insert(Student, {"name": name, "email": email, "usn": usn, "batch": batch,
+                                      "branch": branch, "pass_out_year": pass_out_year})
+
+    def register_staff(self, name, email, unique_id):
+        """Insert a staff member; False if the email or unique ID is already registered."""
+        return self._insert(Staff, {"name": name, "email": email, "unique_id": unique_id})
+
+    def stats(self):
+        return self.cache.stats()
+
+
+user_repository = UserRepository()
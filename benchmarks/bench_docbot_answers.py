@@ -0,0 +1,60 @@
+"""Time-to-first-token and answer-cache savings for DocBot with the offline fake LLM.
+
+Usage: python -m benchmarks.bench_docbot_answers [--pages 50] [--questions 20] [--repeat 3]
+The fake backend (DOCBOT_LLM_BACKEND=fake) emits one token every DOCBOT_FAKE_TOKEN_DELAY
+seconds, so generation time is predictable and no API key is needed. Each question is
+asked --repeat times through the streaming path; repeats should be answer-cache hits.
+"""
+import os
+os.environ.setdefault("DOCBOT_LLM_BACKEND", "fake")
+os.environ.setdefault("DOCBOT_ANSWER_CACHE", "")
+
+import argparse
+import random
+import statistics
+import time
+from app.DocBot.answer_cache import get_answer_cache
+from app.DocBot.demo_page import get_text_chunks, get_vectorstore, get_conversation_chain, stream_userinput
+from app.DocBot.sessions import DocBotSession
+from benchmarks.bench_docbot_chunking import synthetic_pages
+
+
+def ask(question, conversation_chain):
+    """Return (seconds to first token or answer, total seconds)."""
+    session = DocBotSession("bench", "bench")
+    start = time.perf_counter()
+    first = None
+    for event in stream_userinput(question, session, conversation_chain):
+        if first is None and (event.startswith("event: token") or event.startswith("event: done")):
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vectorstore = get_vectorstore(get_text_chunks(synthetic_pages(args.pages, rng)))
+    conversation_chain = get_conversation_chain(vectorstore, docset="bench")
+    questions = [f"What does section {rng.randint(1, 9)}.{rng.randint(1, 9)} say about "
+                 f"{rng.choice(['attendance', 'hostel fees', 'the library', 'examinations'])}?"
+                 for _ in range(args.questions)]
+
+    cold, warm = [], []
+    for round_number in range(args.repeat):
+        for question in questions:
+            (cold if round_number == 0 else warm).append(ask(question, conversation_chain))
+
+    for name, samples in (("first ask", cold), ("repeat ask", warm)):
+        if samples:
+            print(f"{name:<11} n={len(samples):>4} time to first token p50={statistics.median(s[0] for s in samples) * 1000:8.1f}ms "
+                  f"total p50={statistics.median(s[1] for s in samples) * 1000:8.1f}ms")
+    print("answer cache:", get_answer_cache().stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Upload time and prompt size for DocBot with whole-document vs. real chunks.
+
+Usage: python -m benchmarks.bench_docbot_chunking [--pages 200] [--pdf handbook.pdf]
+Without --pdf a synthetic 200-page handbook is generated as page records.
+Prompt tokens are counted with tiktoken when installed, else estimated as chars / 4.
+"""
+import argparse
+import random
+import time
+from app.DocBot.demo_page import get_text_chunks, get_vectorstore
+
+WORDS = ("students must submit the form to the examination section before the deadline and "
+         "the library remains open during semester hours while hostel fees are payable in two "
+         "instalments course code CS501 covers data structures section 4.2 describes attendance").split()
+
+
+def count_tokens(text):
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except ImportError:
+        return len(text) // 4
+
+
+def synthetic_pages(pages, rng):
+    records = []
+    for page in range(1, pages + 1):
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))).capitalize() + "."
+                     for _ in range(40)]
+        records.append({"text": " ".join(sentences), "source": "handbook.pdf", "page": page})
+    return records
+
+
+def pdf_pages(path):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    return [{"text": page.extract_text() or "", "source": path, "page": number}
+            for number, page in enumerate(reader.pages, start=1)]
+
+
+def whole_document_chunks(page_records):
+    """What get_text_chunks used to return: one chunk per document."""
+    documents = {}
+    for record in page_records:
+        documents[record["source"]] = documents.get(record["source"], "") + record["text"]
+    return [{"chunk": text, "source": source, "page": 1, "chunk_index": index}
+            for index, (source, text) in enumerate(documents.items())]
+
+
+def run(name, chunks, question, k=4):
+    start = time.perf_counter()
+    vectorstore = get_vectorstore(chunks)
+    upload_seconds = time.perf_counter() - start
+    docs = vectorstore.similarity_search(question, k=k)
+    context_tokens = sum(count_tokens(doc.page_content) for doc in docs)
+    print(f"{name:<16} chunks={vectorstore.index.ntotal:>6} upload={upload_seconds:7.2f}s "
+          f"prompt context tokens={context_tokens:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--pdf")
+    parser.add_argument("--question", default="What does section 4.2 say about attendance?")
+    args = parser.parse_args()
+
+    page_records = pdf_pages(args.pdf) if args.pdf else synthetic_pages(args.pages, random.Random(0))
+    run("whole document", whole_document_chunks(page_records), args.question)
+    run("chunked", get_text_chunks(page_records), args.question)
+
+
+if __name__ == "__main__":
+    main()
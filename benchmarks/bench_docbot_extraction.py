@@ -0,0 +1,53 @@
+"""Multi-file extraction throughput: inline vs. the extraction process pool.
+
+Usage: python -m benchmarks.bench_docbot_extraction [--files a.pdf b.pdf ...] [--workers 4]
+Without --files, eight synthetic plain-text handbooks of 80 pages each (640 pages,
+form-feed separated) are generated in a temporary directory.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from app.DocBot.extractors import extract_records
+
+WORDS = "admission hostel library examination attendance course fees semester department".split()
+
+
+def synthetic_files(directory, files, pages, rng):
+    paths = []
+    for number in range(files):
+        path = os.path.join(directory, f"handbook_{number}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\f".join(" ".join(rng.choice(WORDS) for _ in range(600)) for _ in range(pages)))
+        paths.append(path)
+    return paths
+
+
+def run(spooled, workers, pages_per_task):
+    start = time.perf_counter()
+    pages = sum(1 for _ in extract_records(spooled, workers=workers, pages_per_task=pages_per_task))
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", nargs="+")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pages-per-task", type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="docbot-bench-")
+    try:
+        paths = args.files or synthetic_files(directory, 8, 80, random.Random(0))
+        spooled = [(path, os.path.basename(path)) for path in paths]
+        for label, workers in (("inline", 0), (f"pool x{args.workers}", args.workers)):
+            pages, seconds = run(spooled, workers, args.pages_per_task)
+            print(f"{label:<10} {pages:>6} pages in {seconds:6.2f}s ({pages / seconds:8.1f} pages/s)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
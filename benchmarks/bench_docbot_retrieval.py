@@ -0,0 +1,93 @@
+"""Recall@k and latency of dense, BM25 and hybrid retrieval over a synthetic DocBot corpus.
+
+Usage: python -m benchmarks.bench_docbot_retrieval [--pages 100] [--queries 200] [--k 4] [--rerank-model NAME]
+Each synthetic page states facts about made-up course codes, USNs and section numbers
+(the exact terms dense embeddings tend to blur); each query asks about one of them and
+the chunk stating that fact is the relevant one.
+"""
+import argparse
+import random
+import statistics
+import time
+from app.DocBot.demo_page import get_text_chunks, get_vectorstore
+from app.DocBot.retrieval import Reranker, build_bm25, hybrid_search
+from app.bm25 import tokenize
+
+TOPICS = ["attendance", "examination fees", "hostel rules", "library fines", "lab safety", "internal marks"]
+FILLER = ("students are advised to read the regulations carefully and contact the department office "
+          "for clarification regarding any rule mentioned in this handbook").split()
+
+
+def synthetic_corpus(pages, rng):
+    """Page records plus (question, fact key) pairs; the fact key appears in exactly one sentence."""
+    records, facts = [], []
+    for page in range(1, pages + 1):
+        sentences = []
+        for _ in range(8):
+            kind = rng.choice(["course", "usn", "section"])
+            topic = rng.choice(TOPICS)
+            if kind == "course":
+                key = f"CS{rng.randint(100, 999)}"
+                sentences.append(f"Course {key} follows special rules for {topic} this semester.")
+                question = f"What are the {topic} rules for course {key}?"
+            elif kind == "usn":
+                key = f"1RV{rng.randint(18, 24)}CS{rng.randint(1, 999):03d}"
+                sentences.append(f"The student with USN {key} is exempted from {topic} requirements.")
+                question = f"Is USN {key} exempted from anything?"
+            else:
+                key = f"{rng.randint(1, 12)}.{rng.randint(1, 9)}.{rng.randint(1, 9)}"
+                sentences.append(f"Section {key} describes the procedure for {topic}.")
+                question = f"What does section {key} describe?"
+            facts.append((question, key))
+            sentences.append(" ".join(rng.choice(FILLER) for _ in range(rng.randint(10, 25))).capitalize() + ".")
+        records.append({"text": " ".join(sentences), "source": "handbook.pdf", "page": page})
+    return records, facts
+
+
+def dense_search(query, vectorstore, k):
+    return vectorstore.similarity_search(query, k=k)
+
+
+def bm25_search(query, vectorstore, bm25, k):
+    ids = vectorstore.index_to_docstore_id
+    return [vectorstore.docstore.search(ids[doc_id]) for doc_id, _ in bm25.search(tokenize(query, keep_codes=True), k=k)]
+
+
+def evaluate(name, search, facts, k):
+    hits, timings = 0, []
+    for question, key in facts:
+        start = time.perf_counter()
+        documents = search(question)
+        timings.append(time.perf_counter() - start)
+        hits += any(key in document.page_content for document in documents[:k])
+    timings.sort()
+    print(f"{name:<18} recall@{k}={hits / len(facts):6.3f}  p50={statistics.median(timings) * 1000:7.2f}ms  "
+          f"p95={timings[int(len(timings) * 0.95)] * 1000:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--rerank-model", default="", help="e.g. cross-encoder/ms-marco-MiniLM-L-6-v2")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records, facts = synthetic_corpus(args.pages, rng)
+    facts = rng.sample(facts, min(args.queries, len(facts)))
+    vectorstore = get_vectorstore(get_text_chunks(records))
+    bm25 = build_bm25(vectorstore)
+    print(f"{vectorstore.index.ntotal} chunks, {len(facts)} queries")
+
+    evaluate("dense (FAISS)", lambda q: dense_search(q, vectorstore, args.k), facts, args.k)
+    evaluate("BM25", lambda q: bm25_search(q, vectorstore, bm25, args.k), facts, args.k)
+    evaluate("hybrid (RRF)", lambda q: hybrid_search(q, vectorstore, bm25, k=args.k), facts, args.k)
+    if args.rerank_model:
+        reranker = Reranker(args.rerank_model)
+        evaluate("hybrid + rerank", lambda q: hybrid_search(q, vectorstore, bm25, k=args.k, reranker=reranker),
+                 facts, args.k)
+
+
+if __name__ == "__main__":
+    main()
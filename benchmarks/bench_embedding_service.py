@@ -0,0 +1,66 @@
+"""RSS and p50/p99 single-query encode latency under concurrency.
+
+Compares calling SentenceTransformer.encode per query (what every module used to do)
+with the shared micro-batching EmbeddingService, and optionally with the sidecar
+(both need the same EMBEDDING_SERVICE_AUTHKEY):
+    python -m app.embedding_service --serve --socket "$XDG_RUNTIME_DIR/infobot/embeddings.sock" &
+    python -m benchmarks.bench_embedding_service --socket "$XDG_RUNTIME_DIR/infobot/embeddings.sock"
+"""
+import argparse
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.embedding_service import EmbeddingService, RemoteEmbeddingService
+from app.settings import EMBEDDING_MODEL_NAME
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(encode, concurrency, queries):
+    def timed(query):
+        start = time.perf_counter()
+        encode(query)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(timed, queries))
+    pct = lambda p: latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)] * 1000
+    return pct(50), pct(99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--socket", help="also benchmark a running embedding sidecar")
+    args = parser.parse_args()
+    queries = [f"what is the admission process for course {i}?" for i in range(args.queries)]
+
+    baseline_rss = rss_mb()
+    from sentence_transformers import SentenceTransformer
+    direct = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    print(f"RSS: {baseline_rss:.0f} MB before model, {rss_mb():.0f} MB with one model copy")
+
+    backends = {"direct": direct.encode, "service": EmbeddingService().warmup().embed_query}
+    if args.socket:
+        backends["sidecar"] = RemoteEmbeddingService(args.socket).embed_query
+
+    print(f"{'backend':<8} {'threads':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, encode in backends.items():
+        for concurrency in args.concurrency:
+            p50, p99 = measure(encode, concurrency, queries)
+            print(f"{name:<8} {concurrency:>7} {p50:>8.1f} {p99:>8.1f}")
+    print(f"RSS at exit: {rss_mb():.0f} MB (sidecar clients do not load the model at all)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Per-query latency of FAQ semantic search: re-encoding vs. the persisted matrix.
+
+Usage: python -m benchmarks.bench_faq_semantic [--sizes 100 10000 100000] [--queries 20]
+"""
+import argparse
+import tempfile
+import time
+from sentence_transformers import SentenceTransformer, util
+from app.infobot.faq_index import FaqEmbeddingIndex
+from app.settings import EMBEDDING_MODEL_NAME
+
+TOPICS = ["admission", "fees", "library", "hostel", "exam", "timetable", "placement", "transport",
+          "scholarship", "canteen", "sports", "department", "faculty", "results", "holidays"]
+
+
+def synthetic_faqs(size):
+    faqs = {}
+    for i in range(size):
+        topic = TOPICS[i % len(TOPICS)]
+        faqs[f"what is the {topic} policy number {i}?"] = f"Answer {i} about {topic}."
+    return faqs
+
+
+def time_per_query(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--before-limit", type=int, default=10_000,
+                        help="only run the re-encoding baseline for FAQ sets up to this size")
+    args = parser.parse_args()
+
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    queries = [f"tell me about {TOPICS[i % len(TOPICS)]}" for i in range(args.queries)]
+
+    print(f"{'faqs':>8} {'before ms/query':>16} {'after ms/query':>15} {'build s':>8}")
+    for size in args.sizes:
+        faqs = synthetic_faqs(size)
+        questions = list(faqs.keys())
+
+        def before(query):
+            query_embedding = model.encode(query, convert_to_tensor=True)
+            faq_embeddings = model.encode(questions, convert_to_tensor=True)
+            return util.pytorch_cos_sim(query_embedding, faq_embeddings).argmax().item()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            start = time.perf_counter()
+            FaqEmbeddingIndex("bench", faqs, str(size), model, cache_dir=cache_dir)
+            build_seconds = time.perf_counter() - start
+            # A fresh instance picks the matrix up from disk, as a worker would at boot
+            index = FaqEmbeddingIndex("bench", faqs, str(size), model, cache_dir=cache_dir)
+            after_ms = time_per_query(index.search, queries)
+
+        before_ms = time_per_query(before, queries[:3]) if size <= args.before_limit else float("nan")
+        print(f"{size:>8} {before_ms:>16.2f} {after_ms:>15.2f} {build_seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
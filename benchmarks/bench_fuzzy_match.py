@@ -0,0 +1,83 @@
+"""Parity and throughput of the indexed fuzzy FAQ matcher against the per-item loop.
+
+Usage: python -m benchmarks.bench_fuzzy_match [--sizes 1000 10000] [--queries 200]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from fuzzywuzzy import fuzz, process
+from app.infobot.fuzzy_index import FuzzyFaqIndex, MATCH_THRESHOLD
+from app.settings import DATA_DIR
+
+
+def legacy_match(faqs, query):
+    """The original match_faq loop: one extractOne call per FAQ question."""
+    max_ratio = 0
+    best_match_answer = None
+    for faq_question, faq_answer in faqs.items():
+        ratio = process.extractOne(query, [faq_question], scorer=fuzz.partial_ratio)
+        if ratio and ratio[1] > max_ratio:
+            max_ratio = ratio[1]
+            best_match_answer = faq_answer
+    return best_match_answer if max_ratio >= MATCH_THRESHOLD else None
+
+
+def perturb(text, rng):
+    words = text.split()
+    rng.shuffle(words)
+    if words and rng.random() < 0.5:
+        words.pop()
+    return " ".join(words).upper() if rng.random() < 0.3 else " ".join(words)
+
+
+def parity(faqs, queries):
+    index = FuzzyFaqIndex(faqs)
+    mismatches = [q for q in queries if index.match(q) != legacy_match(faqs, q)]
+    print(f"parity on {len(queries)} queries: {len(queries) - len(mismatches)} identical")
+    for query in mismatches[:10]:
+        print(f"  mismatch: {query!r}")
+    return not mismatches
+
+
+def throughput(faqs, queries):
+    index = FuzzyFaqIndex(faqs)
+    start = time.perf_counter()
+    for query in queries:
+        index.match(query)
+    indexed = len(queries) / (time.perf_counter() - start)
+
+    sample = queries[:max(len(queries) // 20, 1)]
+    start = time.perf_counter()
+    for query in sample:
+        legacy_match(faqs, query)
+    legacy = len(sample) / (time.perf_counter() - start)
+    print(f"{len(faqs):>8} faqs: legacy {legacy:8.1f} q/s, indexed {indexed:8.1f} q/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with open(os.path.join(DATA_DIR, "staff_faqs.json"), "r", encoding="utf-8") as f:
+        staff_faqs = json.load(f)
+    questions = list(staff_faqs.keys())
+    queries = questions + [perturb(q, rng) for q in questions] + [
+        "what are the college timings", "library", "who is the principal?", "xyz unrelated words",
+        "How do I apply for a scholarship", "hostel fees", "",
+    ]
+    ok = parity(staff_faqs, queries)
+
+    for size in args.sizes:
+        faqs = {f"{rng.choice(questions)} #{i}": f"answer {i}" for i in range(size)}
+        throughput(faqs, [perturb(rng.choice(questions), rng) for _ in range(args.queries)])
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Request latency under the old synchronous DEBUG logging vs. the queued profiles.
+
+Usage: python -m benchmarks.bench_logging [--requests 2000] [--clients 8] [--body-kb 4]
+A small Flask app logs the way the query routes used to on every request: the
+whole request body and several f-string messages per stage. "legacy" is
+logging.basicConfig(level=DEBUG) writing synchronously on the request thread;
+"production" and "debug" are app.logging_config profiles (queued writes, lazy
+%-formatting, sampled DEBUG records). Log output goes to a temporary file.
+"""
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+import threading
+from flask import Flask, request, jsonify
+from app import logging_config
+
+logger = logging.getLogger("bench.logging")
+
+
+def make_app(legacy):
+    app = Flask(__name__)
+
+    @app.route("/query", methods=["POST"])
+    def query():
+        data = request.get_json()
+        if legacy:
+            # The old handlers formatted eagerly, whatever the level
+            logger.debug(f"Received data: {data}")
+            for stage in ("detect", "translate", "faq", "semantic"):
+                logger.info(f"🔎 {stage}: {data['query']}")
+        else:
+            for stage in ("detect", "translate", "faq", "semantic"):
+                logger.debug("🔎 %s: %s", stage, data["query"])
+        return jsonify({"response": "ok"})
+
+    return app
+
+
+def run(name, app, requests, clients, body):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(count):
+        samples = []
+        with app.test_client() as http:
+            for _ in range(count):
+                start = time.perf_counter()
+                http.post("/query", json={"query": "When does the library open?", "history": body})
+                samples.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(samples)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(requests // clients,)) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    print(f"{name:<11} p50={statistics.median(latencies) * 1000:6.3f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:6.3f}ms  {len(latencies) / wall:8.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--body-kb", type=int, default=4)
+    args = parser.parse_args()
+
+    body = "x" * (args.body_kb * 1024)
+    with tempfile.TemporaryFile("w+") as sink:
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        logging.basicConfig(level=logging.DEBUG, stream=sink)
+        run("legacy", make_app(legacy=True), args.requests, args.clients, body)
+
+        for profile in ("production", "debug"):
+            logging_config.configure_logging(profile, stream=sink)
+            run(profile, make_app(legacy=False), args.requests, args.clients, body)
+            print(f"{'':<11} {logging_config.stats()}")
+        logging_config._stop_listener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Login and registration bursts (semester start) against the users database.
+
+Usage: python -m benchmarks.bench_login [--students 5000] [--staff 300] [--clients 32] [--attempts 4000]
+Builds a temporary users database, then has --clients threads log in at once,
+mostly as students with some staff, some wrong passwords, and a share of new
+sign-ups (some of them duplicates). "legacy" is the old code: a Student query,
+then a Staff query, and an existence check before each insert, on SQLite's
+default rollback journal. "repository" is app.users with WAL and a busy timeout.
+It runs with a cold login cache and then with a warm one.
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import threading
+from flask import Flask
+from app.models import db, Student, Staff
+from app.users import UserRepository, engine_options, tune_sqlite
+
+
+def make_app(path, tuned):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    if tuned:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    db.init_app(app)
+    if tuned:
+        with app.app_context():
+            tune_sqlite(db.engine)
+    return app
+
+
+def seed(path, students, staff):
+    app = make_app(path, tuned=False)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Student(name=f"Student {n}", batch="2024", usn=f"1KL24CS{n:04d}", email=f"s{n}@college.edu",
+                                   branch="CS", pass_out_year="2028") for n in range(students))
+        db.session.add_all(Staff(name=f"Staff {n}", unique_id=f"STF{n:04d}", email=f"t{n}@college.edu") for n in range(staff))
+        db.session.commit()
+
+
+def legacy_login(email, secret):
+    student = Student.query.filter_by(email=email, usn=secret).first()
+    if student:
+        return "student"
+    staff = Staff.query.filter_by(email=email, unique_id=secret).first()
+    return "staff" if staff else None
+
+
+def legacy_register(name, email, usn):
+    if Student.query.filter((Student.email == email) | (Student.usn == usn)).first():
+        return False
+    db.session.add(Student(name=name, batch="2025", usn=usn, email=email, branch="CS", pass_out_year="2029"))
+    try:
+        db.session.commit()
+    except Exception:
+        # Lost the race between the check and the insert
+        db.session.rollback()
+        return False
+    return True
+
+
+def workload(attempts, students, staff, seed_value=7):
+    rng = random.Random(seed_value)
+    operations = []
+    for n in range(attempts):
+        roll = rng.random()
+        if roll < 0.15:
+            number = students + rng.randrange(attempts // 10)  # repeats are duplicate sign-ups
+            operations.append(("register", f"New {number}", f"s{number}@college.edu", f"1KL25CS{number:05d}"))
+        elif roll < 0.25:
+            number = rng.randrange(staff)
+            operations.append(("login", f"t{number}@college.edu", f"STF{number:04d}"))
+        elif roll < 0.30:
+            operations.append(("login", f"s{rng.randrange(students)}@college.edu", "wrong"))
+        else:
+            # Popular accounts retry, as students refresh the login page
+            number = int(rng.paretovariate(1.2)) % students
+            operations.append(("login", f"s{number}@college.edu", f"1KL24CS{number:04d}"))
+    return operations
+
+
+def run(name, app, operations, clients, login, register):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(share):
+        samples = []
+        with app.app_context():
+            for operation in share:
+                start = time.perf_counter()
+                try:
+                    if operation[0] == "login":
+                        login(*operation[1:])
+                    else:
+                        register(*operation[1:])
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    db.session.remove()
+                samples.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(samples)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(operations[n::clients],)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    print(f"{name:<18} p50={statistics.median(latencies) * 1000:7.2f}ms p99={latencies[int(len(latencies) * 0.99)] * 1000:7.2f}ms "
+          f"{len(latencies) / wall:7.0f} ops/s  errors={len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--staff", type=int, default=300)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=4000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench_login_")
+    try:
+        template = os.path.join(directory, "template.db")
+        seed(template, args.students, args.staff)
+        operations = workload(args.attempts, args.students, args.staff)
+
+        legacy_path = os.path.join(directory, "legacy.db")
+        shutil.copy(template, legacy_path)
+        run("legacy", make_app(legacy_path, tuned=False), operations, args.clients,
+            legacy_login, legacy_register)
+
+        tuned_path = os.path.join(directory, "tuned.db")
+        shutil.copy(template, tuned_path)
+        app = make_app(tuned_path, tuned=True)
+        repository = UserRepository()
+        register = lambda name, email, usn: repository.register_student(name, email, usn, "2025", "CS", "2029")
+        run("repository (cold)", app, operations, args.clients, repository.authenticate, register)
+        run("repository (warm)", app, operations, args.clients, repository.authenticate, register)
+        print(f"{'':<18} login cache {repository.stats()}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Cold-start cost: package import, create_app() and first-request latency per blueprint.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+    python -m benchmarks.bench_startup [--warmup]
+--warmup sets INFOBOT_WARMUP=1, moving model and index loading into create_app().
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+flask_app = app.create_app()
+t2 = time.perf_counter()
+client = flask_app.test_client()
+results = {"import_s": t1 - t0, "create_app_s": t2 - t1}
+for name, method, path, payload in REQUESTS:
+    start = time.perf_counter()
+    response = getattr(client, method)(path, json=payload)
+    results[name] = time.perf_counter() - start
+    results[name + "_status"] = response.status_code
+print(json.dumps(results))
+"""
+
+REQUESTS = [
+    ("home_first_request_s", "get", "/", None),
+    ("infobot_first_query_s", "post", "/infobot/query", {"query": "what are the college timings?", "audience": "visitor"}),
+    ("docbot_first_page_s", "get", "/docbot/", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--warmup", action="store_true")
+    args = parser.parse_args()
+
+    env = dict(os.environ, INFOBOT_WARMUP="1" if args.warmup else "0", INFOBOT_RESPONSE_CACHE="")
+    code = f"REQUESTS = {REQUESTS!r}\n{PROBE}"
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    results = json.loads(output.stdout.strip().splitlines()[-1])
+    for name, value in results.items():
+        print(f"{name:<28} {value:.3f}" if isinstance(value, float) else f"{name:<28} {value}")
+
+
+if __name__ == "__main__":
+    main()
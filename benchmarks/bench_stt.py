@@ -0,0 +1,95 @@
+"""Latency of whole-clip vs. chunked, pooled speech-to-text under concurrent requests.
+
+Usage: python -m benchmarks.bench_stt [--clients 8] [--lengths 5,20,60] [--backend fake]
+Generates 16 kHz mono WAV clips of the given lengths (seconds) and has --clients
+threads transcribe them at once. "whole clip" is the old /stt path (one recognizer
+call on the entire file per request); "chunked" uses SpeechToTextService. With the
+default fake backend no network or model is needed; recognition cost grows with
+clip length as it does for real recognizers.
+"""
+import io
+import math
+import wave
+import time
+import argparse
+import statistics
+import threading
+import speech_recognition as sr
+from app.stt_tts import STT_BACKENDS, SpeechToTextService
+
+
+def make_clip(seconds, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        tone = bytearray()
+        for i in range(int(seconds * rate)):
+            sample = int(3000 * math.sin(2 * math.pi * 220 * i / rate))
+            tone += sample.to_bytes(2, "little", signed=True)
+        wav.writeframes(bytes(tone))
+    return buffer.getvalue()
+
+
+def whole_clip(clip, backend):
+    start = time.perf_counter()
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(io.BytesIO(clip)) as source:
+        audio = recognizer.record(source)
+    STT_BACKENDS[backend](recognizer, audio, "en")
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+def chunked(clip, service):
+    start = time.perf_counter()
+    first = None
+    for _ in service.transcribe_stream(io.BytesIO(clip)):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def run(name, transcribe, clips, clients):
+    results = {}
+    lock = threading.Lock()
+
+    def client(number):
+        length, clip = clips[number % len(clips)]
+        first, total = transcribe(clip)
+        with lock:
+            results.setdefault(length, []).append((first, total))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    print(f"{name} (wall {wall:.2f}s)")
+    for length in sorted(results):
+        samples = results[length]
+        print(f"  {length:>5}s clips n={len(samples):>3} first text p50={statistics.median(s[0] for s in samples):6.2f}s "
+              f"total p50={statistics.median(s[1] for s in samples):6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--lengths", default="5,20,60")
+    parser.add_argument("--backend", default="fake")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--chunk-seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    clips = [(float(length), make_clip(float(length))) for length in args.lengths.split(",")]
+    service = SpeechToTextService(backend=args.backend, workers=args.workers, chunk_seconds=args.chunk_seconds)
+    run("whole clip", lambda clip: whole_clip(clip, args.backend), clips, args.clients)
+    run("chunked", lambda clip: chunked(clip, service), clips, args.clients)
+    print(service.stats())
+
+
+if __name__ == "__main__":
+    main()
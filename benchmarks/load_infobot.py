@@ -0,0 +1,68 @@
+"""Concurrent-user load test for /infobot/query against /infobot/query/async.
+
+Start the app in a single process first (e.g. python -m app.main), then:
+    python -m benchmarks.load_infobot --base-url http://127.0.0.1:5000 --users 1 8 32
+Queries are made unique per request by default so the response cache does not hide
+the pipeline cost; pass --repeat-queries to measure the cached path instead.
+"""
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+QUERIES = [
+    "what are the college timings?",
+    "how can i access library resources?",
+    "quelles sont les heures d'ouverture du collège ?",
+    "when does the next semester start",
+    "who won the inter-college football tournament",
+]
+
+
+def post(url, payload, timeout):
+    body = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run(url, users, requests_per_user, unique, timeout):
+    def user(user_id):
+        latencies = []
+        for i in range(requests_per_user):
+            query = QUERIES[(user_id + i) % len(QUERIES)]
+            if unique:
+                query = f"{query} #{user_id}-{i}-{time.time_ns()}"
+            latencies.append(post(url, {"query": query, "audience": "visitor"}, timeout))
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        latencies = sorted(l for result in pool.map(user, range(users)) for l in result)
+    elapsed = time.perf_counter() - start
+    p = lambda pct: latencies[min(int(len(latencies) * pct / 100), len(latencies) - 1)] * 1000
+    return len(latencies) / elapsed, p(50), p(99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-user", type=int, default=10)
+    parser.add_argument("--repeat-queries", action="store_true")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<20} {'users':>5} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for path in ("/infobot/query", "/infobot/query/async"):
+        for users in args.users:
+            rps, p50, p99 = run(args.base_url + path, users, args.requests_per_user,
+                                not args.repeat_queries, args.timeout)
+            print(f"{path:<20} {users:>5} {rps:>8.1f} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app.fetch import PageFetcher, extract_sections
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Stand-in college site: /etag and /lastmod revalidate, /slow answers after 2s."""
+
+    def do_GET(self):
+        state = self.server.state
+        state["requests"].append((self.path, dict(self.headers)))
+        if self.path == "/slow":
+            time.sleep(2)
+            return self._send(200, b"<p>too late</p>")
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == state["etag"]:
+                return self._send(304)
+            return self._send(200, state["body"], ETag=state["etag"])
+        if self.path == "/lastmod":
+            if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+                return self._send(304)
+            return self._send(200, state["body"], **{"Last-Modified": LAST_MODIFIED})
+        self._send(404)
+
+    def _send(self, status, body=b"", **headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    server.state = {"requests": [], "etag": '"v1"', "body": b"<h1>Library</h1><p>Opens at 9 am.</p>"}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(site, path):
+    return f"http://127.0.0.1:{site.server_address[1]}{path}"
+
+
+def full_downloads(site, path):
+    return sum(1 for requested, headers in site.state["requests"]
+               if requested == path and "If-None-Match" not in headers and "If-Modified-Since" not in headers)
+
+
+def test_etag_revalidation_reuses_cached_page(site):
+    fetcher = PageFetcher()
+    status, first = fetcher.fetch(url(site, "/etag"))
+    status_again, second = fetcher.fetch(url(site, "/etag"))
+
+    assert (status, status_again) == (200, 200)
+    assert second is first
+    assert fetcher.not_modified == 1
+    assert site.state["requests"][-1][1]["If-None-Match"] == '"v1"'
+    assert full_downloads(site, "/etag") == 1
+
+
+def test_changed_etag_downloads_new_content(site):
+    fetcher = PageFetcher()
+    _, first = fetcher.fetch(url(site, "/etag"))
+    site.state["etag"] = '"v2"'
+    site.state["body"] = b"<p>Closed today.</p>"
+    _, second = fetcher.fetch(url(site, "/etag"))
+
+    assert second is not first
+    assert second.content == b"<p>Closed today.</p>"
+    assert fetcher.not_modified == 0
+
+
+def test_last_modified_revalidation(site):
+    fetcher = PageFetcher()
+    _, first = fetcher.fetch(url(site, "/lastmod"))
+    _, second = fetcher.fetch(url(site, "/lastmod"))
+
+    assert second is first
+    assert fetcher.not_modified == 1
+    assert site.state["requests"][-1][1]["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_uncached_fetch_neither_revalidates_nor_stores(site):
+    fetcher = PageFetcher()
+    fetcher.fetch(url(site, "/etag"), cache=False)
+    fetcher.fetch(url(site, "/etag"), cache=False)
+
+    assert full_downloads(site, "/etag") == 2
+    assert fetcher.pages.get(url(site, "/etag")) is None
+
+
+def test_extract_parses_once_within_ttl(site):
+    calls = []
+
+    def sections(soup):
+        calls.append(1)
+        return extract_sections(soup)
+
+    fetcher = PageFetcher(page_ttl=300)
+    first = fetcher.extract(url(site, "/etag"), sections)
+    second = fetcher.extract(url(site, "/etag"), sections)
+
+    assert first == second == (200, ["Library", "Opens at 9 am."])
+    assert len(calls) == 1
+    assert len(site.state["requests"]) == 1  # fresh within the TTL: not even revalidated
+
+
+def test_extract_keeps_parse_after_304(site):
+    calls = []
+
+    def sections(soup):
+        calls.append(1)
+        return extract_sections(soup)
+
+    fetcher = PageFetcher(page_ttl=0)
+    fetcher.extract(url(site, "/etag"), sections)
+    fetcher.extract(url(site, "/etag"), sections)
+
+    assert len(site.state["requests"]) == 2
+    assert fetcher.not_modified == 1
+    assert len(calls) == 1
+
+
+def test_extract_many_returns_by_the_deadline(site):
+    fetcher = PageFetcher()
+    start = time.perf_counter()
+    results = fetcher.extract_many([url(site, "/etag"), url(site, "/slow"), url(site, "/missing")],
+                                   extract_sections, deadline=0.5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5
+    assert results == {url(site, "/etag"): ["Library", "Opens at 9 am."]}
@@ -0,0 +1,73 @@
+import os
+import json
+import random
+import pytest
+from fuzzywuzzy import fuzz, process
+from app.infobot.fuzzy_index import FuzzyFaqIndex, MATCH_THRESHOLD
+from app.settings import DATA_DIR
+
+
+def legacy_best_match(faqs, query):
+    """The original match_faq loop: one extractOne call per FAQ question."""
+    max_ratio = 0
+    best_match_answer = None
+    for faq_question, faq_answer in faqs.items():
+        ratio = process.extractOne(query, [faq_question], scorer=fuzz.partial_ratio)
+        if ratio and ratio[1] > max_ratio:
+            max_ratio = ratio[1]
+            best_match_answer = faq_answer
+    return best_match_answer, max_ratio
+
+
+def perturb(text, rng):
+    words = text.split()
+    rng.shuffle(words)
+    if words and rng.random() < 0.5:
+        words.pop()
+    return " ".join(words).upper() if rng.random() < 0.3 else " ".join(words)
+
+
+def load_faqs(name):
+    with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def queries_for(faqs, seed=0, sample=25):
+    # The legacy loop runs pure-Python partial_ratio per question, so a sample keeps this quick
+    rng = random.Random(seed)
+    questions = rng.sample(list(faqs.keys()), min(sample, len(faqs)))
+    return questions + [perturb(question, rng) for question in questions] + [
+        "what are the college timings", "library", "who is the principal?", "xyz unrelated words",
+        "How do I apply for a scholarship", "hostel fees", "!!!", "",
+    ]
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+@pytest.mark.parametrize("corpus", ["staff_faqs.json", "visitor_faqs.json"])
+def test_answer_and_score_match_legacy_loop(corpus):
+    faqs = load_faqs(corpus)
+    index = FuzzyFaqIndex(faqs)
+    for query in queries_for(faqs):
+        answer, score = index.best_match(query)
+        legacy_answer, legacy_score = legacy_best_match(faqs, query)
+        assert (answer if score else None, score) == (legacy_answer, legacy_score), query
+        assert index.match(query) == (legacy_answer if legacy_score >= MATCH_THRESHOLD else None), query
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_synthetic_faqs_match_legacy_loop():
+    rng = random.Random(1)
+    words = "admission fee hostel library exam timetable result scholarship bus canteen placement lab".split()
+    faqs = {" ".join(rng.sample(words, rng.randint(2, 5))) + f" {n}?": f"answer {n}" for n in range(80)}
+    index = FuzzyFaqIndex(faqs)
+    for query in queries_for(faqs, seed=2, sample=10) + [" ".join(rng.sample(words, 3)) for _ in range(20)]:
+        answer, score = index.best_match(query)
+        assert (answer if score else None, score) == legacy_best_match(faqs, query), query
+
+
+def test_shortlist_finds_exact_questions():
+    rng = random.Random(3)
+    faqs = {f"question {rng.random():.12f} about topic {n}": f"answer {n}" for n in range(1000)}
+    index = FuzzyFaqIndex(faqs, shortlist_size=50)
+    for question, answer in list(faqs.items())[::97]:
+        assert index.best_match(question) == (answer, 100)